@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.database import Base
 from app.core.config import settings
-from app.models import user, document, word  # 导入所有模型
+from app.models import user, document, word, job, dictionary  # 导入所有模型
 
 # this is the Alembic Config object
 config = context.config
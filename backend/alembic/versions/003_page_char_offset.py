@@ -0,0 +1,39 @@
+"""page character offsets
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('pages', sa.Column('char_offset', sa.Integer(), server_default='0', nullable=False))
+
+    # 回填已有页面的偏移：同一文档中之前所有页面的长度之和
+    op.execute("""
+        UPDATE pages SET char_offset = sub.char_offset
+        FROM (
+            SELECT id, COALESCE(SUM(char_length(content)) OVER (
+                PARTITION BY document_id ORDER BY page_number
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ), 0) AS char_offset
+            FROM pages
+        ) AS sub
+        WHERE pages.id = sub.id
+    """)
+
+    op.create_index('idx_page_doc_offset', 'pages', ['document_id', 'char_offset'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_page_doc_offset', table_name='pages')
+    op.drop_column('pages', 'char_offset')
@@ -0,0 +1,34 @@
+"""ingestion checkpoints
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ingestion_jobs', sa.Column('pages_committed', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    # 领取任务的进程，启动时据此识别上一个进程遗留的运行中任务
+    op.add_column('ingestion_jobs', sa.Column('owner', sa.String(length=200), nullable=True))
+
+    # 续传时按 (document_id, page_number) 清理和定位页面，并防止重复写入同一页
+    op.create_index('idx_page_doc_number', 'pages', ['document_id', 'page_number'], unique=True)
+
+
+def downgrade():
+    op.drop_index('idx_page_doc_number', table_name='pages')
+    op.drop_column('ingestion_jobs', 'owner')
+    op.drop_column('ingestion_jobs', 'heartbeat_at')
+    op.drop_column('ingestion_jobs', 'attempts')
+    op.drop_column('ingestion_jobs', 'pages_committed')
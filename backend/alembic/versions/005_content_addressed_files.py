@@ -0,0 +1,117 @@
+"""content-addressed document files shared by documents
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create document_files table
+    op.create_table('document_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('total_pages', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('legacy_document_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_files_id'), 'document_files', ['id'], unique=False)
+    op.create_index(op.f('ix_document_files_content_hash'), 'document_files', ['content_hash'], unique=True)
+
+    # 已有文档各自对应一个文件记录（没有内容哈希，不参与去重）
+    op.execute("""
+        INSERT INTO document_files (file_path, total_pages, status, content_type, legacy_document_id)
+        SELECT d.file_path, d.total_pages, d.status,
+               (SELECT j.content_type FROM ingestion_jobs j
+                WHERE j.document_id = d.id ORDER BY j.id DESC LIMIT 1),
+               d.id
+        FROM documents d
+    """)
+
+    # documents.file_id
+    op.add_column('documents', sa.Column('file_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE documents SET file_id = f.id
+        FROM document_files f WHERE f.legacy_document_id = documents.id
+    """)
+    op.alter_column('documents', 'file_id', nullable=False)
+    op.create_foreign_key('fk_documents_file_id', 'documents', 'document_files', ['file_id'], ['id'])
+    op.create_index(op.f('ix_documents_file_id'), 'documents', ['file_id'], unique=False)
+
+    # pages 改为按文件存储
+    op.add_column('pages', sa.Column('file_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE pages SET file_id = f.id
+        FROM document_files f WHERE f.legacy_document_id = pages.document_id
+    """)
+    op.drop_index('idx_page_doc_number', table_name='pages')
+    op.drop_index('idx_page_doc_offset', table_name='pages')
+    op.drop_column('pages', 'document_id')
+    op.alter_column('pages', 'file_id', nullable=False)
+    op.create_foreign_key('fk_pages_file_id', 'pages', 'document_files', ['file_id'], ['id'])
+    op.create_index('idx_page_file_number', 'pages', ['file_id', 'page_number'], unique=True)
+    op.create_index('idx_page_file_offset', 'pages', ['file_id', 'char_offset'], unique=False)
+
+    # 解析任务改为按文件执行
+    op.add_column('ingestion_jobs', sa.Column('file_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE ingestion_jobs SET file_id = f.id
+        FROM document_files f WHERE f.legacy_document_id = ingestion_jobs.document_id
+    """)
+    op.alter_column('ingestion_jobs', 'file_id', nullable=False)
+    op.alter_column('ingestion_jobs', 'document_id', nullable=True)
+    op.create_foreign_key('fk_ingestion_jobs_file_id', 'ingestion_jobs', 'document_files', ['file_id'], ['id'])
+    op.create_index(op.f('ix_ingestion_jobs_file_id'), 'ingestion_jobs', ['file_id'], unique=False)
+    op.drop_column('ingestion_jobs', 'content_type')
+
+    op.drop_column('document_files', 'legacy_document_id')
+
+
+def downgrade():
+    op.add_column('ingestion_jobs', sa.Column('content_type', sa.String(length=100), nullable=True))
+    op.execute("""
+        UPDATE ingestion_jobs SET content_type = f.content_type
+        FROM document_files f WHERE f.id = ingestion_jobs.file_id
+    """)
+    op.drop_index(op.f('ix_ingestion_jobs_file_id'), table_name='ingestion_jobs')
+    op.drop_constraint('fk_ingestion_jobs_file_id', 'ingestion_jobs', type_='foreignkey')
+    op.drop_column('ingestion_jobs', 'file_id')
+
+    # 页面归还给引用该文件的第一个文档
+    op.add_column('pages', sa.Column('document_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE pages SET document_id = sub.document_id
+        FROM (SELECT file_id, MIN(id) AS document_id FROM documents GROUP BY file_id) AS sub
+        WHERE sub.file_id = pages.file_id
+    """)
+    op.execute("DELETE FROM pages WHERE document_id IS NULL")
+    op.drop_index('idx_page_file_offset', table_name='pages')
+    op.drop_index('idx_page_file_number', table_name='pages')
+    op.drop_constraint('fk_pages_file_id', 'pages', type_='foreignkey')
+    op.drop_column('pages', 'file_id')
+    op.alter_column('pages', 'document_id', nullable=False)
+    op.create_foreign_key('pages_document_id_fkey', 'pages', 'documents', ['document_id'], ['id'])
+    op.create_index('idx_page_doc_offset', 'pages', ['document_id', 'char_offset'], unique=False)
+    op.create_index('idx_page_doc_number', 'pages', ['document_id', 'page_number'], unique=True)
+
+    op.drop_index(op.f('ix_documents_file_id'), table_name='documents')
+    op.drop_constraint('fk_documents_file_id', 'documents', type_='foreignkey')
+    op.drop_column('documents', 'file_id')
+
+    op.drop_index(op.f('ix_document_files_content_hash'), table_name='document_files')
+    op.drop_index(op.f('ix_document_files_id'), table_name='document_files')
+    op.drop_table('document_files')
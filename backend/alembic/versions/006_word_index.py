@@ -0,0 +1,31 @@
+"""inverted word index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有文件的索引通过 `python -m app.cli build-word-index` 回填
+    op.create_table('word_index',
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('word', sa.String(length=100), nullable=False),
+        sa.Column('postings', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.ForeignKeyConstraint(['file_id'], ['document_files.id'], ),
+        sa.PrimaryKeyConstraint('file_id', 'word')
+    )
+
+
+def downgrade():
+    op.drop_table('word_index')
@@ -0,0 +1,31 @@
+"""full-text search on pages
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('pages', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english'::regconfig, regexp_replace(content, '<[^>]+>', ' ', 'g'))", persisted=True),
+        nullable=True
+    ))
+    op.create_index('idx_page_search', 'pages', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('idx_page_search', table_name='pages')
+    op.drop_column('pages', 'search_vector')
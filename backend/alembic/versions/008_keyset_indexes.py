@@ -0,0 +1,30 @@
+"""keyset pagination indexes
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_word_user_last_clicked', 'word_clicks', ['user_id', 'last_clicked_at', 'id'], unique=False)
+    op.create_index('idx_word_user_click_count', 'word_clicks', ['user_id', 'click_count', 'id'], unique=False)
+    op.create_index('idx_word_user_word_id', 'word_clicks', ['user_id', 'word', 'id'], unique=False)
+    op.create_index('idx_document_user_created', 'documents', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_document_user_created', table_name='documents')
+    op.drop_index('idx_word_user_word_id', table_name='word_clicks')
+    op.drop_index('idx_word_user_click_count', table_name='word_clicks')
+    op.drop_index('idx_word_user_last_clicked', table_name='word_clicks')
@@ -0,0 +1,68 @@
+"""per-user vocabulary summary
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_vocabulary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('word', sa.String(length=100), nullable=False),
+        sa.Column('click_count', sa.Integer(), nullable=False),
+        sa.Column('first_clicked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_clicked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('mastery_status', sa.String(length=20), nullable=False),
+        sa.Column('latest_click_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['latest_click_id'], ['word_clicks.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('user_id', 'word')
+    )
+    op.create_index('idx_vocab_user_last_clicked', 'user_vocabulary', ['user_id', 'last_clicked_at', 'word'], unique=False)
+    op.create_index('idx_vocab_user_click_count', 'user_vocabulary', ['user_id', 'click_count', 'word'], unique=False)
+    
+    # 回填已有数据：点击统计按 (user_id, word) 汇总，掌握状态取最近一次点击
+    op.execute("""
+        INSERT INTO user_vocabulary (user_id, word, click_count, first_clicked_at, last_clicked_at,
+                                     mastery_status, latest_click_id)
+        SELECT totals.user_id, totals.word, totals.click_count, totals.first_clicked_at,
+               totals.last_clicked_at, COALESCE(latest.mastery_status, '生词'), latest.id
+        FROM (
+            SELECT user_id, word,
+                   sum(coalesce(click_count, 1)) AS click_count,
+                   min(first_clicked_at) AS first_clicked_at,
+                   max(last_clicked_at) AS last_clicked_at
+            FROM word_clicks
+            GROUP BY user_id, word
+        ) AS totals
+        JOIN (
+            SELECT DISTINCT ON (user_id, word) user_id, word, id, mastery_status
+            FROM word_clicks
+            ORDER BY user_id, word, last_clicked_at DESC NULLS LAST, id DESC
+        ) AS latest ON latest.user_id = totals.user_id AND latest.word = totals.word
+    """)
+    
+    # 生词列表改为读取汇总表，word_clicks 上的分页索引不再使用
+    op.drop_index('idx_word_user_word_id', table_name='word_clicks')
+    op.drop_index('idx_word_user_click_count', table_name='word_clicks')
+    op.drop_index('idx_word_user_last_clicked', table_name='word_clicks')
+
+
+def downgrade():
+    op.create_index('idx_word_user_last_clicked', 'word_clicks', ['user_id', 'last_clicked_at', 'id'], unique=False)
+    op.create_index('idx_word_user_click_count', 'word_clicks', ['user_id', 'click_count', 'id'], unique=False)
+    op.create_index('idx_word_user_word_id', 'word_clicks', ['user_id', 'word', 'id'], unique=False)
+    op.drop_index('idx_vocab_user_click_count', table_name='user_vocabulary')
+    op.drop_index('idx_vocab_user_last_clicked', table_name='user_vocabulary')
+    op.drop_table('user_vocabulary')
@@ -0,0 +1,56 @@
+"""unique key on word click selections
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 合并并发点击产生的重复选择：保留最近点击的一行，累加点击次数
+    op.execute("""
+        CREATE TEMPORARY TABLE word_click_merge ON COMMIT DROP AS
+        SELECT id,
+               first_value(id) OVER w AS keep_id,
+               sum(coalesce(click_count, 1)) OVER (PARTITION BY user_id, document_id, selected_text) AS total,
+               min(first_clicked_at) OVER (PARTITION BY user_id, document_id, selected_text) AS first_at
+        FROM word_clicks
+        WHERE selected_text IS NOT NULL
+        WINDOW w AS (PARTITION BY user_id, document_id, selected_text
+                     ORDER BY last_clicked_at DESC NULLS LAST, id DESC)
+    """)
+    op.execute("""
+        UPDATE word_clicks AS c
+        SET click_count = m.total, first_clicked_at = m.first_at
+        FROM word_click_merge AS m
+        WHERE c.id = m.keep_id AND m.id = m.keep_id
+          AND EXISTS (SELECT 1 FROM word_click_merge d WHERE d.keep_id = m.keep_id AND d.id <> d.keep_id)
+    """)
+    op.execute("""
+        UPDATE user_vocabulary AS v
+        SET latest_click_id = m.keep_id
+        FROM word_click_merge AS m
+        WHERE v.latest_click_id = m.id AND m.id <> m.keep_id
+    """)
+    op.execute("""
+        DELETE FROM word_clicks AS c
+        USING word_click_merge AS m
+        WHERE c.id = m.id AND m.id <> m.keep_id
+    """)
+    op.create_unique_constraint(
+        'uq_word_click_selection', 'word_clicks', ['user_id', 'document_id', 'selected_text']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_word_click_selection', 'word_clicks', type_='unique')
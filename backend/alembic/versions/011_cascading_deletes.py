@@ -0,0 +1,46 @@
+"""cascading foreign keys and document soft delete
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+# (约束名, 表, 列, 引用表, ON DELETE)
+FOREIGN_KEYS = [
+    ('word_clicks_document_id_fkey', 'word_clicks', 'document_id', 'documents', 'CASCADE'),
+    ('ingestion_jobs_document_id_fkey', 'ingestion_jobs', 'document_id', 'documents', 'SET NULL'),
+    ('fk_ingestion_jobs_file_id', 'ingestion_jobs', 'file_id', 'document_files', 'CASCADE'),
+    ('fk_pages_file_id', 'pages', 'file_id', 'document_files', 'CASCADE'),
+    ('word_index_file_id_fkey', 'word_index', 'file_id', 'document_files', 'CASCADE'),
+]
+
+
+def upgrade():
+    op.add_column('documents', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'idx_document_deleted', 'documents', ['deleted_at'], unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL')
+    )
+    
+    for name, table, column, referent, ondelete in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def downgrade():
+    for name, table, column, referent, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'])
+    
+    op.drop_index('idx_document_deleted', table_name='documents')
+    op.drop_column('documents', 'deleted_at')
@@ -0,0 +1,26 @@
+"""document vocabulary profile
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已解析的文件通过 `python -m app.cli build-vocabulary-profiles` 回填
+    op.add_column('document_files', sa.Column('vocabulary_profile', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('document_files', 'vocabulary_profile')
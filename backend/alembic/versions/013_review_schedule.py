@@ -0,0 +1,38 @@
+"""spaced-repetition schedule on user vocabulary
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user_vocabulary', sa.Column('review_interval', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_vocabulary', sa.Column('ease', sa.Float(), server_default='2.5', nullable=False))
+    op.add_column('user_vocabulary', sa.Column('repetitions', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_vocabulary', sa.Column('due_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('user_vocabulary', sa.Column('last_reviewed_at', sa.DateTime(timezone=True), nullable=True))
+    # 已掌握的单词永远不再到期，不进入索引，复习队列不必扫描越来越长的前缀
+    op.create_index(
+        'idx_vocab_user_due', 'user_vocabulary', ['user_id', 'due_at'], unique=False,
+        postgresql_where=sa.text("mastery_status <> '已掌握'")
+    )
+
+
+def downgrade():
+    op.drop_index('idx_vocab_user_due', table_name='user_vocabulary')
+    op.drop_column('user_vocabulary', 'last_reviewed_at')
+    op.drop_column('user_vocabulary', 'due_at')
+    op.drop_column('user_vocabulary', 'repetitions')
+    op.drop_column('user_vocabulary', 'ease')
+    op.drop_column('user_vocabulary', 'review_interval')
@@ -0,0 +1,33 @@
+"""persistent local dictionary
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 词条通过 `python -m app.cli import-dictionary` 批量导入，或在查询词典 API 时写入
+    op.create_table('dictionary_entries',
+        sa.Column('word', sa.String(length=100), nullable=False),
+        sa.Column('phonetic', sa.String(length=200), nullable=True),
+        sa.Column('meanings', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('word')
+    )
+
+
+def downgrade():
+    op.drop_table('dictionary_entries')
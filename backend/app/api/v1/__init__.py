@@ -1,9 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, documents, words
+from app.api.v1.endpoints import auth, documents, words, admin
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["认证"])
 api_router.include_router(documents.router, prefix="/documents", tags=["文档"])
 api_router.include_router(words.router, prefix="/words", tags=["单词"])
-
+api_router.include_router(admin.router, prefix="/admin", tags=["管理"])
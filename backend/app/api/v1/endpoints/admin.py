@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.database import get_db
+from app.models.job import IngestionJob
+from app.schemas.document import IngestionJobResponse
+from app.api.v1.dependencies import get_current_user
+from app.services import dictionary
+from app.services.ingestion import stalled_jobs_query, retry_job
+
+router = APIRouter()
+
+@router.get("/ingestions/stalled", response_model=List[IngestionJobResponse])
+async def list_stalled_ingestions(
+    skip: int = 0,
+    limit: int = 100,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """列出停滞或失败的解析任务"""
+    return stalled_jobs_query(db).order_by(IngestionJob.id).offset(skip).limit(limit).all()
+
+@router.post("/ingestions/{job_id}/retry", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def retry_ingestion(
+    job_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """重试停滞或失败的解析任务，从最近的检查点继续"""
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    if not retry_job(db, job, reset_attempts=True):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="任务已完成或正在执行"
+        )
+    db.refresh(job)
+    
+    return job
+
+@router.post("/ingestions/retry-stalled")
+async def retry_stalled_ingestions(
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """重试所有停滞或失败的解析任务"""
+    jobs = stalled_jobs_query(db).order_by(IngestionJob.id).all()
+    retried = sum(1 for job in jobs if retry_job(db, job, reset_attempts=True))
+    
+    return {"retried": retried}
+
+@router.get("/dictionary/cache-stats")
+async def dictionary_cache_stats(current_user = Depends(get_current_user)):
+    """词典缓存的大小、命中率、淘汰和过期次数，以及上游熔断器的状态"""
+    return {**dictionary.cache.stats(), "circuit_breaker": dictionary.breaker.stats()}
@@ -1,106 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 import os
-import shutil
 import logging
+from datetime import datetime
 from app.core.database import get_db
 from app.core.config import settings
-from app.models.document import Document, Page
-from app.models.word import WordClick
-from app.schemas.document import DocumentResponse, DocumentListResponse, PageResponse
+from app.models.document import Document, DocumentFile, DocumentStatus, Page
+from app.models.job import IngestionJob
+from app.models.word import UserVocabulary
+from app.schemas.document import (
+    DocumentResponse, DocumentListResponse, PageResponse, IngestionJobResponse,
+    SearchResponse, DocumentDifficultyResponse, PageLocation
+)
 from app.api.v1.dependencies import get_current_user
-from app.services.document_parser import parse_document
+from app.services import dictionary
+from app.services.file_storage import (
+    save_upload_file, FileTooLargeError, StoredUpload, discard_upload, lock_content, place_upload
+)
+from app.services.highlight import page_highlights
+from app.services.ingestion import enqueue_file
+from app.services.pagination import InvalidCursorError, count_cache, decode_cursor, keyset_page
+from app.services.purge import submit_purge
+from app.services.search import search_pages
+from app.services.vocabulary_profile import estimate_difficulty, page_words, rare_words, user_vocabulary_states
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 支持上传的文件类型：扩展名 -> MIME 类型（与 document_parser.parse_document 一致）
+SUPPORTED_TYPES = {
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".epub": "application/epub+zip",
+}
+
 # 确保上传目录存在
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-@router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+def get_or_create_file(db: Session, upload: StoredUpload, content_type: Optional[str]) -> DocumentFile:
+    """按内容哈希获取文件记录，不存在时创建，并把上传的临时文件放到存储路径
+
+    持有内容锁直到调用方提交，期间后台清理不会删除这个文件。
+    """
+    lock_content(db, upload.content_hash)
+    stored = db.query(DocumentFile).filter(
+        DocumentFile.content_hash == upload.content_hash
+    ).first()
+    # 复用已有记录时以它的路径为准（相同内容可能以不同扩展名保存过）；
+    # 磁盘文件已存在时丢弃本次的副本，缺失时用本次的副本补上
+    place_upload(upload, stored.file_path if stored else upload.file_path)
+    if stored is None:
+        stored = DocumentFile(
+            content_hash=upload.content_hash,
+            file_path=upload.file_path,
+            file_size=upload.size,
+            content_type=content_type,
+            status=DocumentStatus.PENDING
+        )
+        db.add(stored)
+        try:
+            db.flush()
+        except IntegrityError:
+            # 并发上传了相同内容，使用对方创建的记录
+            db.rollback()
+            lock_content(db, upload.content_hash)
+            stored = db.query(DocumentFile).filter(
+                DocumentFile.content_hash == upload.content_hash
+            ).one()
+    return stored
+
+@router.post("/upload", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     file: UploadFile = File(...),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """上传文档（仅支持TXT格式）"""
-    # 检查文件类型 - 仅支持TXT
-    if not (file.content_type == 'text/plain' or file.filename.endswith('.txt')):
+    """上传文档（TXT/Markdown、PDF、EPUB），解析在后台任务中进行"""
+    # 检查文件类型：MIME 类型或扩展名任一匹配即可（浏览器不一定能识别 EPUB）
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if file.content_type not in SUPPORTED_TYPES.values() and extension not in SUPPORTED_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="仅支持 .txt 格式的文件"
+            detail="仅支持 .txt、.pdf、.epub 格式的文件"
         )
     
-    # 检查文件大小
-    file_content = await file.read()
-    if len(file_content) > settings.MAX_FILE_SIZE:
+    # 分块保存文件，边写边检查大小并计算内容哈希
+    try:
+        upload = await save_upload_file(file)
+    except FileTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="文件大小超过限制"
         )
     
-    # 保存文件
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{current_user.id}_{file.filename}")
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
-    
+    # 按内容哈希查找已存储的文件，内容相同则复用解析结果
     try:
-        # 解析文档
-        full_content, pages = parse_document(file_path, file.content_type)
-        
-        # 创建文档记录
-        db_document = Document(
-            user_id=current_user.id,
-            title=file.filename.rsplit('.', 1)[0],  # 使用文件名（不含扩展名）作为标题
-            filename=file.filename,
-            file_path=file_path,
-            content=full_content,
-            total_pages=len(pages)
-        )
-        db.add(db_document)
-        db.flush()
-        
-        # 创建页面记录
-        for page_num, page_content in enumerate(pages, 1):
-            db_page = Page(
-                document_id=db_document.id,
-                page_number=page_num,
-                content=page_content
-            )
-            db.add(db_page)
-        
-        db.commit()
-        db.refresh(db_document)
-        
-        return db_document
-    except Exception as e:
-        # 如果解析失败，删除已上传的文件
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        stored = get_or_create_file(db, upload, file.content_type)
+    finally:
+        discard_upload(upload)
+    
+    # 创建文档记录，解析状态与文件一致
+    db_document = Document(
+        user_id=current_user.id,
+        title=file.filename.rsplit('.', 1)[0],  # 使用文件名（不含扩展名）作为标题
+        filename=file.filename,
+        file_path=stored.file_path,
+        file_id=stored.id,
+        total_pages=stored.total_pages or 0,
+        status=stored.status
+    )
+    db.add(db_document)
+    db.flush()
+    
+    job = enqueue_file(db, stored, current_user.id, db_document.id)
+    count_cache.invalidate("documents", current_user.id)
+    db.refresh(job)
+    
+    return job
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """查询文档解析任务状态"""
+    job = db.query(IngestionJob).filter(
+        IngestionJob.id == job_id,
+        IngestionJob.user_id == current_user.id
+    ).first()
+    
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"文档解析失败: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
         )
+    
+    return job
 
 @router.get("/", response_model=DocumentListResponse)
 async def get_documents(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    with_total: bool = True,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """获取用户的文档列表，按上传时间倒序，基于游标分页"""
+    query = db.query(Document).filter(
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None)
+    )
+    
+    try:
+        after = decode_cursor(cursor, (datetime.fromisoformat, int)) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    documents, next_cursor = keyset_page(
+        query, (Document.created_at, Document.id), True, after, limit,
+        key=lambda document: (document.created_at, document.id)
+    )
+    
+    total = None
+    if with_total:
+        total = count_cache.get_or_compute(
+            ("documents", current_user.id),
+            lambda: query.count()
+        )
+    
+    return {"documents": documents, "total": total, "next_cursor": next_cursor}
+
+@router.get("/difficulty", response_model=DocumentDifficultyResponse)
+async def rank_documents_by_difficulty(
+    order: str = "asc",  # asc: 由易到难, desc: 由难到易
+    limit: int = Query(50, ge=1, le=500),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """获取用户的文档列表"""
-    documents = db.query(Document).filter(
-        Document.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    """按估计的未知词密度对用户的已解析文档排序
+
+    使用解析时预先计算的词频档案与生词本求交集，不读取任何页面。
+    """
+    states = user_vocabulary_states(
+        db.query(UserVocabulary.word, UserVocabulary.mastery_status).filter(
+            UserVocabulary.user_id == current_user.id
+        )
+    )
+    rows = db.query(Document.id, Document.title, DocumentFile.vocabulary_profile).join(
+        DocumentFile, DocumentFile.id == Document.file_id
+    ).filter(
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None),
+        DocumentFile.vocabulary_profile.isnot(None)
+    ).all()
     
-    total = db.query(Document).filter(
-        Document.user_id == current_user.id
-    ).count()
+    ranked = [
+        {"document_id": document_id, "title": title, **estimate_difficulty(profile, states)}
+        for document_id, title, profile in rows
+    ]
+    ranked.sort(key=lambda item: item["unknown_density"], reverse=(order == "desc"))
     
-    return {"documents": documents, "total": total}
+    return {"documents": ranked[:limit]}
+
+@router.get("/search", response_model=SearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """在用户的所有文档中全文检索，返回按相关度排序的页面和高亮片段"""
+    hits, total = search_pages(db, current_user.id, q, skip, limit)
+    return {"hits": hits, "total": total}
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
@@ -111,7 +228,8 @@ async def get_document(
     """获取文档详情"""
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.user_id == current_user.id
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None)
     ).first()
     
     if not document:
@@ -122,17 +240,41 @@ async def get_document(
     
     return document
 
+def prefetch_words(db: Session, user_id: int, file: DocumentFile, content: str) -> List[str]:
+    """页面中需要预取释义的单词：按文档内出现次数从少到多，跳过短词、生词本中的和已缓存的单词"""
+    words = [
+        word for word in page_words(content)
+        if len(word) >= settings.DICTIONARY_PREFETCH_MIN_LENGTH and word not in dictionary.cache
+    ]
+    if not words:
+        return []
+    known = {
+        word for (word,) in db.query(UserVocabulary.word).filter(
+            UserVocabulary.user_id == user_id,
+            UserVocabulary.word.in_(words)
+        )
+    }
+    return rare_words(words, file.vocabulary_profile, known, settings.DICTIONARY_PREFETCH_LIMIT)
+
 @router.get("/{document_id}/pages/{page_number}", response_model=PageResponse)
 async def get_page(
     document_id: int,
     page_number: int,
+    background_tasks: BackgroundTasks,
+    highlight: bool = False,
+    prefetch: bool = False,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """获取文档的某一页"""
+    """获取文档的某一页，highlight=true 时同时返回已保存短语在页面中的位置
+
+    prefetch=true 时在响应发出后预取页面中较少见、且不在生词本里的单词的释义，
+    之后点击这些单词可以直接命中缓存。
+    """
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.user_id == current_user.id
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None)
     ).first()
     
     if not document:
@@ -141,8 +283,15 @@ async def get_page(
             detail="文档不存在"
         )
     
+    if document.status != DocumentStatus.READY:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="文档尚未解析完成"
+        )
+    
+    # 页面按文件存储，内容相同的文档共享同一份页面
     page = db.query(Page).filter(
-        Page.document_id == document_id,
+        Page.file_id == document.file_id,
         Page.page_number == page_number
     ).first()
     
@@ -152,18 +301,36 @@ async def get_page(
             detail="页面不存在"
         )
     
-    return page
+    if prefetch:
+        words = prefetch_words(db, current_user.id, document.file, page.content)
+        if words:
+            background_tasks.add_task(dictionary.prefetch_definitions, words)
+    
+    return PageResponse(
+        id=page.id,
+        document_id=document.id,
+        page_number=page.page_number,
+        content=page.content,
+        char_offset=page.char_offset,
+        highlights=page_highlights(db, current_user.id, page.content) if highlight else None
+    )
 
-@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_document(
+@router.get("/{document_id}/locate", response_model=PageLocation)
+async def locate_offset(
     document_id: int,
+    offset: int = Query(..., ge=0),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """删除文档"""
+    """把全文字符偏移映射为 (页码, 页内位置)
+
+    解析时记录了每页在全文中的起始偏移，这里沿 idx_page_file_offset 取起始偏移
+    不超过 offset 的最后一页，一次索引查找，与页数无关。
+    """
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.user_id == current_user.id
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None)
     ).first()
     
     if not document:
@@ -172,48 +339,51 @@ async def delete_document(
             detail="文档不存在"
         )
     
-    # 删除文件（即使文件删除失败，也继续删除数据库记录）
-    file_path = document.file_path
-    if file_path and os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-            logger.info(f"成功删除文件: {file_path}")
-        except OSError as e:
-            # 文件删除失败（可能是权限问题、文件被占用等），记录日志但继续删除数据库记录
-            logger.warning(f"删除文件失败: {file_path}, 错误: {str(e)}")
-        except Exception as e:
-            # 其他异常，记录日志但继续删除数据库记录
-            logger.error(f"删除文件时发生未知错误: {file_path}, 错误: {str(e)}")
-    
-    # 删除数据库记录（先删除关联记录，再删除文档）
-    try:
-        # 先删除关联的 WordClick 记录
-        word_clicks = db.query(WordClick).filter(
-            WordClick.document_id == document_id
-        ).all()
-        for word_click in word_clicks:
-            db.delete(word_click)
-        logger.info(f"删除关联的 WordClick 记录: {len(word_clicks)} 条")
-        
-        # 删除关联的 Page 记录
-        pages = db.query(Page).filter(
-            Page.document_id == document_id
-        ).all()
-        for page in pages:
-            db.delete(page)
-        logger.info(f"删除关联的 Page 记录: {len(pages)} 条")
-        
-        # 最后删除文档记录
-        db.delete(document)
-        db.commit()
-        logger.info(f"成功删除文档记录: document_id={document_id}")
-    except Exception as e:
-        db.rollback()
-        logger.error(f"删除文档记录失败: document_id={document_id}, 错误: {str(e)}")
+    if document.status != DocumentStatus.READY:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"删除文档失败: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="文档尚未解析完成"
         )
     
-    return None
+    page = db.query(Page.page_number, Page.char_offset, func.char_length(Page.content)).filter(
+        Page.file_id == document.file_id,
+        Page.char_offset <= offset
+    ).order_by(Page.char_offset.desc(), Page.page_number.desc()).first()
+    
+    if not page or offset >= page[1] + page[2]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="偏移超出文档范围"
+        )
+    
+    return PageLocation(document_id=document.id, page_number=page[0], position=offset - page[1])
 
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """删除文档
+
+    只标记软删除，文档立即对用户不可见；点击记录、页面和文件由后台清理，
+    请求耗时与文档大小无关。
+    """
+    deleted = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id,
+        Document.deleted_at.is_(None)
+    ).update({Document.deleted_at: func.now()}, synchronize_session=False)
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文档不存在"
+        )
+    
+    db.commit()
+    count_cache.invalidate("documents", current_user.id)
+    submit_purge(document_id)
+    logger.info(f"文档已标记删除: document_id={document_id}")
+    
+    return None
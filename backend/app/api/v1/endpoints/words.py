@@ -1,19 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
 from typing import List, Optional
 from app.core.database import get_db
-from app.models.word import WordClick
-from app.models.document import Document, Page
+from app.core.config import settings
+from app.models.word import UserVocabulary, WordClick
+from app.models.document import Document
 from app.schemas.word import (
     WordClickResponse, WordDetailResponse,
-    WordListResponse, WordContext, SaveSelectionRequest
+    WordListResponse, WordContext, SaveSelectionRequest, SaveSelectionsRequest,
+    BulkWordsRequest, BulkStatusRequest, BulkOperationResponse,
+    ReviewItem, ReviewGradeRequest, WordDefinition, LookupRequest
 )
 from app.api.v1.dependencies import get_current_user
+from app.services.dictionary import get_word_definition, get_word_definitions
+from app.services.highlight import add_phrases, remove_phrases
+from app.services.pagination import InvalidCursorError, count_cache, decode_cursor, keyset_page
+from app.services.vocabulary import (
+    MASTERY_STATUSES, delete_words, grade_review, review_queue, save_selections, update_mastery
+)
+from app.services.word_index import find_word_contexts
 from datetime import datetime
 
 router = APIRouter()
 
+def check_documents(db: Session, user_id: int, document_ids) -> None:
+    """验证文档都属于当前用户"""
+    document_ids = set(document_ids)
+    owned = {
+        document_id for (document_id,) in db.query(Document.id).filter(
+            Document.id.in_(document_ids),
+            Document.user_id == user_id,
+            Document.deleted_at.is_(None)
+        )
+    }
+    if owned != document_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="文档不存在"
+        )
+
 @router.post("/save-selection", response_model=WordClickResponse)
 async def save_selection(
     request: SaveSelectionRequest,
@@ -21,85 +46,178 @@ async def save_selection(
     db: Session = Depends(get_db)
 ):
     """保存用户选择的文本和翻译到生词本"""
-    # 验证文档属于当前用户
-    document = db.query(Document).filter(
-        Document.id == request.document_id,
-        Document.user_id == current_user.id
-    ).first()
+    check_documents(db, current_user.id, [request.document_id])
     
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="文档不存在"
-        )
-    
-    # 提取第一个单词作为word字段（用于索引和兼容性）
-    first_word = request.selected_text.strip().split()[0].lower() if request.selected_text.strip() else ""
+    # 相同的选择已存在时原子地累加点击次数
+    (word_click,) = save_selections(db, current_user.id, [request.model_dump()])
+    db.commit()
+    count_cache.invalidate("words", current_user.id)
+    add_phrases(current_user.id, [request.selected_text])
     
-    # 查找是否已存在相同的选择
-    word_click = db.query(WordClick).filter(
-        WordClick.user_id == current_user.id,
-        WordClick.document_id == request.document_id,
-        WordClick.selected_text == request.selected_text
-    ).first()
-    
-    if word_click:
-        # 更新现有记录
-        word_click.user_translation = request.user_translation
-        word_click.click_count += 1
-        word_click.last_clicked_at = datetime.utcnow()
-        word_click.page_number = request.page_number
-        word_click.position_in_page = request.position_in_page
-    else:
-        # 创建新记录
-        word_click = WordClick(
-            user_id=current_user.id,
-            document_id=request.document_id,
-            word=first_word,
-            selected_text=request.selected_text,
-            user_translation=request.user_translation,
-            page_number=request.page_number,
-            position_in_page=request.position_in_page,
-            click_count=1
-        )
-        db.add(word_click)
+    return word_click
+
+@router.post("/save-selections", response_model=List[WordClickResponse])
+async def save_selections_batch(
+    request: SaveSelectionsRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """批量保存选中文本，全部在一个事务中提交，返回与请求顺序一致的记录"""
+    check_documents(db, current_user.id, [s.document_id for s in request.selections])
     
+    word_clicks = save_selections(
+        db, current_user.id, [s.model_dump() for s in request.selections]
+    )
     db.commit()
-    db.refresh(word_click)
+    count_cache.invalidate("words", current_user.id)
+    add_phrases(current_user.id, [s.selected_text for s in request.selections])
     
-    return word_click
+    return word_clicks
+
+def require_word_filter(request: BulkWordsRequest) -> None:
+    """批量操作必须指定单词列表或文档，避免误操作整个生词本"""
+    if request.words is None and request.document_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请指定单词列表或文档"
+        )
+
+def vocabulary_response(entry: UserVocabulary, latest: WordClick) -> dict:
+    """汇总行 + 最近一次点击记录 -> WordClickResponse 字段"""
+    return {
+        "id": latest.id,
+        "user_id": entry.user_id,
+        "document_id": latest.document_id,
+        "word": entry.word,
+        "selected_text": latest.selected_text,
+        "user_translation": latest.user_translation,
+        "page_number": latest.page_number,
+        "position_in_page": latest.position_in_page,
+        "click_count": entry.click_count,
+        "first_clicked_at": entry.first_clicked_at,
+        "last_clicked_at": entry.last_clicked_at,
+        "mastery_status": entry.mastery_status,
+    }
+
+def get_vocabulary_entry(db: Session, user_id: int, word: str) -> UserVocabulary:
+    """读取单词的汇总行，不存在时返回 404"""
+    entry = db.get(UserVocabulary, (user_id, word.lower()))
+    if not entry or entry.latest_click is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="单词不存在"
+        )
+    return entry
+
+# 支持的排序键 -> (排序列, 游标值解析函数)，单词作为唯一的次级排序键
+WORD_SORT_KEYS = {
+    "last_clicked_at": ((UserVocabulary.last_clicked_at, UserVocabulary.word), (datetime.fromisoformat, str)),
+    "click_count": ((UserVocabulary.click_count, UserVocabulary.word), (int, str)),
+    "word": ((UserVocabulary.word,), (str,)),
+}
 
 @router.get("/", response_model=WordListResponse)
 async def get_word_list(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     sort_by: str = "last_clicked_at",  # click_count, last_clicked_at, word
     order: str = "desc",  # asc, desc
     mastery_status: Optional[str] = None,
+    with_total: bool = True,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """获取生词列表"""
-    query = db.query(WordClick).filter(WordClick.user_id == current_user.id)
+    """获取生词列表，每个单词一项
+
+    基于游标分页：把上一页返回的 next_cursor 原样传回即可取下一页。
+    total 来自缓存的计数，with_total=false 时不计算。
+    """
+    query = db.query(UserVocabulary).filter(UserVocabulary.user_id == current_user.id)
     
-    # 按掌握状态筛选
+    # 按掌握状态筛选（取值受限，计数缓存的键不会无限增长）
     if mastery_status:
-        query = query.filter(WordClick.mastery_status == mastery_status)
+        if mastery_status not in MASTERY_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"mastery_status 只能是 {'、'.join(MASTERY_STATUSES)}"
+            )
+        query = query.filter(UserVocabulary.mastery_status == mastery_status)
     
-    # 排序
-    if sort_by == "click_count":
-        order_func = desc(WordClick.click_count) if order == "desc" else WordClick.click_count
-    elif sort_by == "word":
-        order_func = WordClick.word if order == "asc" else desc(WordClick.word)
-    else:  # last_clicked_at
-        order_func = desc(WordClick.last_clicked_at) if order == "desc" else WordClick.last_clicked_at
+    columns, parsers = WORD_SORT_KEYS.get(sort_by, WORD_SORT_KEYS["last_clicked_at"])
+    try:
+        after = decode_cursor(cursor, parsers) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    query = query.order_by(order_func)
+    rows, next_cursor = keyset_page(
+        query.add_entity(WordClick).join(WordClick, WordClick.id == UserVocabulary.latest_click_id),
+        columns, order != "asc", after, limit,
+        key=lambda row: [getattr(row[0], column.key) for column in columns]
+    )
     
-    total = query.count()
-    words = query.offset(skip).limit(limit).all()
+    total = None
+    if with_total:
+        total = count_cache.get_or_compute(
+            ("words", current_user.id, mastery_status or None),
+            lambda: query.count()
+        )
     
-    return {"words": words, "total": total}
+    words = [vocabulary_response(entry, latest) for entry, latest in rows]
+    return {"words": words, "total": total, "next_cursor": next_cursor}
+
+def review_response(entry: UserVocabulary, latest: WordClick) -> dict:
+    """汇总行 + 最近一次点击记录 -> ReviewItem 字段"""
+    return {
+        **vocabulary_response(entry, latest),
+        "review_interval": entry.review_interval,
+        "ease": entry.ease,
+        "repetitions": entry.repetitions,
+        "due_at": entry.due_at,
+        "last_reviewed_at": entry.last_reviewed_at,
+    }
+
+@router.post("/lookup", response_model=List[WordDefinition])
+async def lookup_words(
+    request: LookupRequest,
+    current_user = Depends(get_current_user)
+):
+    """批量查询释义，按去重后的单词顺序返回；未缓存的单词以有限的并发查询上游"""
+    return await get_word_definitions(request.words)
+
+@router.get("/lookup/{word}", response_model=WordDefinition)
+async def lookup_word(
+    word: str,
+    current_user = Depends(get_current_user)
+):
+    """查询单词释义，上游不可用时返回 source=fallback 的基础信息"""
+    return await get_word_definition(word)
+
+@router.get("/review/next", response_model=List[ReviewItem])
+async def get_review_queue(
+    limit: int = Query(20, ge=1, le=200),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """按到期时间返回接下来需要复习的单词（不含已掌握的单词）"""
+    return [review_response(entry, latest) for entry, latest in review_queue(db, current_user.id, limit)]
+
+@router.post("/review/{word}", response_model=ReviewItem)
+async def review_word(
+    word: str,
+    request: ReviewGradeRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """提交一次复习评分（0-5），按 SM-2 计算下次复习时间"""
+    entry = grade_review(db, current_user.id, word, request.grade)
+    if entry is None or entry.latest_click is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="单词不存在"
+        )
+    db.commit()
+    
+    return review_response(entry, entry.latest_click)
 
 @router.get("/{word}", response_model=WordDetailResponse)
 async def get_word_detail(
@@ -108,64 +226,62 @@ async def get_word_detail(
     db: Session = Depends(get_db)
 ):
     """获取单词详情，包括所有出现过的上下文"""
-    # 获取该用户对该单词的所有点击记录
-    word_clicks = db.query(WordClick).filter(
-        WordClick.user_id == current_user.id,
-        WordClick.word == word.lower()
-    ).all()
+    entry = get_vocabulary_entry(db, current_user.id, word)
     
-    if not word_clicks:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="单词不存在"
+    # 通过倒排索引获取上下文（全词匹配，每页一个上下文）
+    document_ids = db.query(WordClick.document_id).filter(
+        WordClick.user_id == current_user.id,
+        WordClick.word == entry.word
+    ).distinct()
+    documents = db.query(Document).filter(
+        Document.id.in_(document_ids),
+        Document.deleted_at.is_(None)
+    ).order_by(Document.id).all()
+    contexts = [
+        WordContext(
+            word=word,
+            document_id=document.id,
+            document_title=document.title,
+            page_number=page_number,
+            context=context
         )
+        for document, page_number, context in find_word_contexts(
+            db, word, documents, settings.WORD_CONTEXT_LIMIT
+        )
+    ]
     
-    # 合并所有记录（按文档分组）
-    word_dict = {}
-    for wc in word_clicks:
-        if wc.document_id not in word_dict:
-            word_dict[wc.document_id] = {
-                "click_count": 0,
-                "first_clicked_at": wc.first_clicked_at,
-                "last_clicked_at": wc.last_clicked_at,
-                "mastery_status": wc.mastery_status
-            }
-        word_dict[wc.document_id]["click_count"] += wc.click_count
-    
-    # 获取所有上下文
-    contexts = []
-    for doc_id, info in word_dict.items():
-        document = db.query(Document).filter(Document.id == doc_id).first()
-        if document:
-            # 在所有页面中查找包含该单词的句子
-            pages = db.query(Page).filter(Page.document_id == doc_id).all()
-            for page in pages:
-                sentences = page.content.split('.')
-                for sentence in sentences:
-                    if word.lower() in sentence.lower():
-                        contexts.append(WordContext(
-                            word=word,
-                            document_id=doc_id,
-                            document_title=document.title,
-                            page_number=page.page_number,
-                            context=sentence.strip()
-                        ))
-                        break  # 每页只取一个上下文
-    
-    # 使用最新的点击记录作为主记录
-    main_click = max(word_clicks, key=lambda x: x.last_clicked_at)
-    
-    return WordDetailResponse(
-        id=main_click.id,
-        user_id=main_click.user_id,
-        document_id=main_click.document_id,
-        word=main_click.word,
-        click_count=sum(wc.click_count for wc in word_clicks),
-        first_clicked_at=min(wc.first_clicked_at for wc in word_clicks),
-        last_clicked_at=max(wc.last_clicked_at for wc in word_clicks),
-        mastery_status=main_click.mastery_status,
-        contexts=contexts
+    return WordDetailResponse(**vocabulary_response(entry, entry.latest_click), contexts=contexts)
+
+@router.post("/bulk/status", response_model=BulkOperationResponse)
+async def bulk_update_status(
+    request: BulkStatusRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """批量更新单词的掌握状态，按单词列表和/或文档筛选"""
+    require_word_filter(request)
+    affected = update_mastery(
+        db, current_user.id, request.mastery_status, request.words, request.document_id
     )
+    db.commit()
+    count_cache.invalidate("words", current_user.id)
+    
+    return {"affected": affected}
+
+@router.post("/bulk/delete", response_model=BulkOperationResponse)
+async def bulk_delete_words(
+    request: BulkWordsRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """批量从单词本中删除单词，按单词列表和/或文档筛选"""
+    require_word_filter(request)
+    affected, phrases = delete_words(db, current_user.id, request.words, request.document_id)
+    db.commit()
+    count_cache.invalidate("words", current_user.id)
+    remove_phrases(db, current_user.id, phrases)
+    
+    return {"affected": affected}
 
 @router.patch("/{word}/status", response_model=WordClickResponse)
 async def update_word_status(
@@ -175,25 +291,17 @@ async def update_word_status(
     db: Session = Depends(get_db)
 ):
     """更新单词的掌握状态"""
-    word_clicks = db.query(WordClick).filter(
-        WordClick.user_id == current_user.id,
-        WordClick.word == word.lower()
-    ).all()
-    
-    if not word_clicks:
+    if not update_mastery(db, current_user.id, mastery_status, words=[word]):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="单词不存在"
         )
     
-    # 更新所有相关记录的掌握状态
-    for wc in word_clicks:
-        wc.mastery_status = mastery_status
-    
     db.commit()
-    db.refresh(word_clicks[0])
+    count_cache.invalidate("words", current_user.id)
+    entry = get_vocabulary_entry(db, current_user.id, word)
     
-    return word_clicks[0]
+    return vocabulary_response(entry, entry.latest_click)
 
 @router.delete("/{word}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_word(
@@ -201,23 +309,16 @@ async def delete_word(
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """从单词本中删除单词"""
-    word_clicks = db.query(WordClick).filter(
-        WordClick.user_id == current_user.id,
-        WordClick.word == word.lower()
-    ).all()
-    
-    if not word_clicks:
+    """从单词本中删除单词及其所有点击记录"""
+    deleted, phrases = delete_words(db, current_user.id, words=[word])
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="单词不存在"
         )
     
-    # 删除所有相关记录
-    for wc in word_clicks:
-        db.delete(wc)
-    
     db.commit()
+    count_cache.invalidate("words", current_user.id)
+    remove_phrases(db, current_user.id, phrases)
     
     return None
-
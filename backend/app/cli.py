@@ -0,0 +1,114 @@
+"""命令行维护工具
+
+用法:
+    python -m app.cli build-word-index [--file-id ID]
+    python -m app.cli build-vocabulary [--user-id ID]
+    python -m app.cli build-vocabulary-profiles [--file-id ID]
+    python -m app.cli import-dictionary PATH [--format kaikki|dictionaryapi] [--source NAME]
+"""
+import argparse
+import gzip
+import logging
+from collections import Counter
+from app.core.database import SessionLocal
+from app.models.document import DocumentFile, DocumentStatus
+from app.models.user import User
+from app.services.local_dictionary import PARSERS, import_dump
+from app.services.vocabulary import rebuild_vocabulary
+from app.services.vocabulary_profile import build_profile, count_stored_pages
+from app.services.word_index import rebuild_file_index
+
+logger = logging.getLogger(__name__)
+
+def build_word_index(args) -> None:
+    """为已解析的文件（重新）建立倒排词索引，每个文件一个事务"""
+    db = SessionLocal()
+    try:
+        query = db.query(DocumentFile.id).filter(DocumentFile.status == DocumentStatus.READY)
+        if args.file_id:
+            query = query.filter(DocumentFile.id == args.file_id)
+        file_ids = [file_id for (file_id,) in query.order_by(DocumentFile.id).all()]
+        for file_id in file_ids:
+            rebuild_file_index(db, file_id)
+            db.commit()
+            logger.info(f"词索引已重建: file_id={file_id}")
+        print(f"已重建 {len(file_ids)} 个文件的词索引")
+    finally:
+        db.close()
+
+def build_vocabulary(args) -> None:
+    """根据 word_clicks 重建生词本汇总表，每个用户一个事务"""
+    db = SessionLocal()
+    try:
+        query = db.query(User.id)
+        if args.user_id:
+            query = query.filter(User.id == args.user_id)
+        user_ids = [user_id for (user_id,) in query.order_by(User.id).all()]
+        for user_id in user_ids:
+            count = rebuild_vocabulary(db, user_id)
+            db.commit()
+            logger.info(f"生词本汇总已重建: user_id={user_id}, {count} 个单词")
+        print(f"已重建 {len(user_ids)} 个用户的生词本汇总")
+    finally:
+        db.close()
+
+def build_vocabulary_profiles(args) -> None:
+    """根据已存储的页面为已解析的文件（重新）计算词频档案，每个文件一个事务"""
+    db = SessionLocal()
+    try:
+        query = db.query(DocumentFile).filter(DocumentFile.status == DocumentStatus.READY)
+        if args.file_id:
+            query = query.filter(DocumentFile.id == args.file_id)
+        count = 0
+        for stored in query.order_by(DocumentFile.id).all():
+            word_counts = Counter()
+            count_stored_pages(db, stored.id, word_counts)
+            stored.vocabulary_profile = build_profile(word_counts)
+            db.commit()
+            count += 1
+            logger.info(f"词频档案已计算: file_id={stored.id}, {len(word_counts)} 个不同单词")
+        print(f"已计算 {count} 个文件的词频档案")
+    finally:
+        db.close()
+
+def import_dictionary(args) -> None:
+    """把开放词典的导出文件（可为 .gz）批量导入本地词典"""
+    opener = gzip.open if args.path.endswith(".gz") else open
+    db = SessionLocal()
+    try:
+        with opener(args.path, "rt", encoding="utf-8") as file:
+            count = import_dump(db, file, args.format, args.source or args.format, args.batch_size)
+        print(f"已导入 {count} 个单词到本地词典")
+    finally:
+        db.close()
+
+def main(argv=None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="ReadSmart 维护工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("build-word-index", help="回填倒排词索引")
+    index_parser.add_argument("--file-id", type=int, help="只处理指定的文件")
+    index_parser.set_defaults(func=build_word_index)
+
+    vocabulary_parser = subparsers.add_parser("build-vocabulary", help="回填生词本汇总表")
+    vocabulary_parser.add_argument("--user-id", type=int, help="只处理指定的用户")
+    vocabulary_parser.set_defaults(func=build_vocabulary)
+
+    profile_parser = subparsers.add_parser("build-vocabulary-profiles", help="回填文档词频档案")
+    profile_parser.add_argument("--file-id", type=int, help="只处理指定的文件")
+    profile_parser.set_defaults(func=build_vocabulary_profiles)
+
+    dictionary_parser = subparsers.add_parser("import-dictionary", help="导入开放词典到本地词典表")
+    dictionary_parser.add_argument("path", help="词典导出文件（JSONL，可 gzip 压缩）")
+    dictionary_parser.add_argument("--format", choices=sorted(PARSERS), default="kaikki",
+                                   help="kaikki: kaikki.org 的 Wiktionary 导出；dictionaryapi: 与词典 API 响应相同的词条")
+    dictionary_parser.add_argument("--source", help="记录在词条上的来源名称，默认与格式相同")
+    dictionary_parser.add_argument("--batch-size", type=int, default=1000, help="每个事务写入的单词数")
+    dictionary_parser.set_defaults(func=import_dictionary)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -21,10 +21,61 @@ class Settings(BaseSettings):
     # 文件上传
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10485760  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 流式写盘的分块大小（1MB）
+    
+    # 文档解析任务
+    INGESTION_WORKERS: int = 2  # 后台解析线程数
+    PAGE_INSERT_BATCH_SIZE: int = 200  # 每批插入的页面数（也是断点续传的检查点粒度）
+    PAGE_CHECKPOINT_INTERVAL: int = 30  # 批次未满时，距上次检查点超过该秒数也会提交
+    INGESTION_HEARTBEAT_INTERVAL: int = 15  # 运行中任务的心跳间隔（秒），与检查点无关
+    INGESTION_MAX_ATTEMPTS: int = 3  # 同一任务最多执行的次数，用于止住反复使进程崩溃的文件
+    INGESTION_STALL_SECONDS: int = 60  # 运行中任务超过该秒数没有心跳视为执行进程已退出，应为心跳间隔的数倍
+    PAGE_TARGET_SIZE: int = 500  # 文本文档的目标页面字符数
+    VOCAB_PROFILE_SIZE: int = 5000  # 词频档案保留的高频词数量
+    
+    # PDF 文本提取
+    PDF_TEXT_BACKEND: str = "pypdf2"  # 文本提取后端名称
+    PDF_EXTRACT_WORKERS: int = 0  # 提取进程数，0 表示使用 CPU 核数
+    PDF_PAGES_PER_TASK: int = 16  # 每个子任务提取的页数
+    PDF_PARALLEL_MIN_PAGES: int = 32  # 页数少于此值时在当前进程内顺序提取
+    
+    # OCR（图片PDF）
+    OCR_WORKERS: int = 0  # OCR 进程数，0 表示使用 CPU 核数
+    OCR_MAX_INFLIGHT: int = 0  # 同时光栅化的最大页数，0 表示与进程数相同
+    OCR_DPI: int = 300  # 光栅化分辨率，降低可减少内存和耗时，但会影响识别质量
+    OCR_GRAYSCALE: bool = True  # 以灰度图光栅化，内存约为彩色的1/3
+    OCR_PAGE_TIMEOUT: int = 120  # 单页光栅化/识别超时（秒）
+    OCR_LANG: str = "eng"
+    
+    # 生词本
+    WORD_CONTEXT_LIMIT: int = 50  # 单词详情最多返回的上下文数量
+    HIGHLIGHT_CACHE_USERS: int = 1000  # 缓存短语匹配器的用户数上限
+    HIGHLIGHT_CACHE_TTL: int = 600  # 匹配器的最长缓存秒数，过期后从数据库重建
+    
+    # 列表分页
+    COUNT_CACHE_TTL: int = 60  # 列表总数的缓存秒数，数据变更时提前失效
+    COUNT_CACHE_SIZE: int = 10000  # 列表总数缓存的条目上限
     
     # 词典API
     DICTIONARY_API_URL: str = "https://api.dictionaryapi.dev/api/v2/entries/en"
     DICTIONARY_API_KEY: str = ""
+    DICTIONARY_TIMEOUT: float = 1.5  # 单次查询上游的总耗时上限（秒，含对冲请求），超时返回缓存或基础信息
+    DICTIONARY_CONNECT_TIMEOUT: float = 1.0  # 建立连接的超时秒数，须小于 DICTIONARY_TIMEOUT
+    DICTIONARY_MAX_CONNECTIONS: int = 20  # 连接池上限
+    DICTIONARY_MAX_KEEPALIVE: int = 10  # 保持的空闲长连接数
+    DICTIONARY_KEEPALIVE_EXPIRY: float = 30.0  # 空闲长连接的保留秒数
+    DICTIONARY_CACHE_SIZE: int = 10000  # 释义缓存的条目上限
+    DICTIONARY_CACHE_TTL: int = 86400  # 释义的缓存秒数
+    DICTIONARY_NEGATIVE_TTL: int = 600  # 查不到的单词的缓存秒数
+    DICTIONARY_ERROR_TTL: int = 30  # 上游出错或熔断时基础信息的缓存秒数
+    DICTIONARY_STALE_TTL: int = 604800  # 释义过期后仍可返回旧值的秒数，期间在后台刷新
+    DICTIONARY_HEDGE_DELAY: float = 0.4  # 首个请求超过此秒数未返回时发出第二个请求（快速失败不对冲），0 表示不对冲
+    DICTIONARY_BREAKER_THRESHOLD: int = 5  # 连续失败多少次后熔断
+    DICTIONARY_BREAKER_COOLDOWN: float = 30.0  # 熔断后多少秒再试探上游
+    DICTIONARY_BATCH_CONCURRENCY: int = 8  # 批量查询同时进行的上游请求数
+    DICTIONARY_PREFETCH_CONCURRENCY: int = 2  # 页面预取同时进行的上游请求数，给用户的查询留出连接
+    DICTIONARY_PREFETCH_LIMIT: int = 40  # 每页预取释义的单词数上限
+    DICTIONARY_PREFETCH_MIN_LENGTH: int = 4  # 短于此长度的单词不预取
     
     @field_validator('DATABASE_URL', mode='before')
     @classmethod
@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1 import api_router
+from app.services.ingestion import shutdown_executor, recover_interrupted_jobs
+from app.services import dictionary, ocr, pdf_extract
+from app.services.purge import purge_deleted_documents
 
 app = FastAPI(
     title="ReadSmart API",
@@ -21,6 +24,24 @@ app.add_middleware(
 # 注册路由
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def resume_ingestion():
+    """从检查点继续上次进程退出时未完成的解析任务和文档清理"""
+    recover_interrupted_jobs()
+    purge_deleted_documents()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    """等待正在执行的解析任务结束"""
+    shutdown_executor(wait=True)
+    ocr.shutdown_pool(wait=True)
+    pdf_extract.shutdown_pool(wait=True)
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """关闭词典服务的长连接"""
+    await dictionary.close_client()
+
 @app.get("/")
 async def root():
     return {"message": "ReadSmart API", "version": "1.0.0"}
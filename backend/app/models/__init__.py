@@ -1,6 +1,7 @@
 from app.models.user import User
-from app.models.document import Document, Page
-from app.models.word import WordClick
-
-__all__ = ["User", "Document", "Page", "WordClick"]
+from app.models.document import Document, DocumentFile, Page
+from app.models.word import WordClick, WordIndexEntry, UserVocabulary
+from app.models.job import IngestionJob
+from app.models.dictionary import DictionaryEntry
 
+__all__ = ["User", "Document", "DocumentFile", "Page", "WordClick", "WordIndexEntry", "UserVocabulary", "IngestionJob", "DictionaryEntry"]
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DictionaryEntry(Base):
+    """本地词典：批量导入的开放词典数据，以及从词典 API 查询到的释义（写穿）"""
+    __tablename__ = "dictionary_entries"
+    
+    word = Column(String(100), primary_key=True)  # 小写
+    phonetic = Column(String(200), nullable=True)
+    meanings = Column(JSONB, nullable=False)  # 与 WordDefinition.meanings 相同的结构
+    source = Column(String(50), nullable=False)  # dictionary-api 或导入时指定的来源
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
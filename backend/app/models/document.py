@@ -1,8 +1,35 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from app.core.database import Base
 
+# 全文检索使用的文本配置，以及去掉内联标签后的页面正文表达式
+SEARCH_CONFIG = "english"
+PLAIN_CONTENT_SQL = "regexp_replace(content, '<[^>]+>', ' ', 'g')"
+
+class DocumentStatus:
+    """文档解析状态"""
+    PENDING = "pending"   # 已上传，等待解析
+    PARSING = "parsing"   # 正在解析
+    READY = "ready"       # 解析完成，可以阅读
+    FAILED = "failed"     # 解析失败
+
+class DocumentFile(Base):
+    """按内容哈希存储的上传文件及其解析结果，内容相同的文档共享同一份页面"""
+    __tablename__ = "document_files"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=True)  # SHA-256，早期上传的文件为空
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(Integer, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    total_pages = Column(Integer, default=0)
+    status = Column(String(20), nullable=False, default=DocumentStatus.PENDING)
+    # 解析时统计的词频档案 {"tokens": 总词数, "distinct": 不同单词数, "words": {单词: 次数}}
+    vocabulary_profile = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Document(Base):
     __tablename__ = "documents"
     
@@ -11,24 +38,48 @@ class Document(Base):
     title = Column(String(200), nullable=False)
     filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
+    file_id = Column(Integer, ForeignKey("document_files.id"), nullable=False, index=True)
     content = Column(Text)  # 解析后的文本内容
     total_pages = Column(Integer, default=0)
+    status = Column(String(20), nullable=False, default=DocumentStatus.PENDING, index=True)
+    error_message = Column(Text, nullable=True)  # 解析失败原因
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # 软删除时间，非空表示等待后台清理
     
     # 关系
     user = relationship("User", backref="documents")
-    word_clicks = relationship("WordClick", back_populates="document")
+    file = relationship("DocumentFile", backref="documents")
+    word_clicks = relationship("WordClick", back_populates="document", passive_deletes=True)
+    
+    __table_args__ = (
+        # 文档列表的键集分页索引
+        Index('idx_document_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_document_deleted', 'deleted_at', postgresql_where=deleted_at.isnot(None)),
+    )
 
 class Page(Base):
     __tablename__ = "pages"
     
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    file_id = Column(Integer, ForeignKey("document_files.id", ondelete="CASCADE"), nullable=False)
     page_number = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
+    char_offset = Column(Integer, nullable=False, default=0)  # 本页在全文中的起始字符偏移
+    # 全文检索向量（去掉标签后的正文），由数据库自动生成
+    search_vector = Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, {PLAIN_CONTENT_SQL})", persisted=True)
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 关系
-    document = relationship("Document", backref="pages")
+    file = relationship("DocumentFile", backref=backref("pages", passive_deletes=True))
+    
+    # 复合索引
+    __table_args__ = (
+        Index('idx_page_file_number', 'file_id', 'page_number', unique=True),
+        Index('idx_page_file_offset', 'file_id', 'char_offset'),
+        Index('idx_page_search', 'search_vector', postgresql_using='gin'),
+    )
 
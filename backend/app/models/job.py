@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import backref, relationship
+from app.core.database import Base
+
+class JobStatus:
+    """后台任务状态"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    WAITING = "waiting"  # 同一文件已有任务在解析，随该任务结束而结束
+
+class IngestionJob(Base):
+    """文档解析任务（按文件解析，结果由引用该文件的所有文档共享）"""
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    file_id = Column(Integer, ForeignKey("document_files.id", ondelete="CASCADE"), nullable=False, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True, index=True)  # 触发解析的文档
+    status = Column(String(20), nullable=False, default=JobStatus.QUEUED, index=True)
+    error_message = Column(Text, nullable=True)
+    pages_committed = Column(Integer, nullable=False, default=0)  # 检查点：已提交到 pages 的页数
+    attempts = Column(Integer, nullable=False, default=0)  # 执行次数
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # 最近一次心跳时间，用于发现停滞任务
+    owner = Column(String(200), nullable=True)  # 领取任务的进程（主机:pid:启动标识）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # 关系
+    file = relationship("DocumentFile", backref=backref("ingestion_jobs", passive_deletes=True))
+    document = relationship("Document", backref=backref("ingestion_jobs", passive_deletes=True))
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
+# 同一用户在同一文档中的同一段选中文本只保存一行，重复点击累加 click_count
+SELECTION_CONSTRAINT = "uq_word_click_selection"
+
 class WordClick(Base):
     __tablename__ = "word_clicks"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     word = Column(String(100), nullable=False, index=True)  # 保留用于兼容性，存储选中文本的第一个单词
     selected_text = Column(String(500), nullable=True)  # 用户选中的完整文本（可能是短语）
     user_translation = Column(String(1000), nullable=True)  # 用户手动输入的翻译
@@ -27,5 +31,46 @@ class WordClick(Base):
     __table_args__ = (
         Index('idx_user_word', 'user_id', 'word'),
         Index('idx_user_doc_word', 'user_id', 'document_id', 'word'),
+        UniqueConstraint('user_id', 'document_id', 'selected_text', name=SELECTION_CONSTRAINT),
     )
 
+
+class UserVocabulary(Base):
+    """生词本汇总：每个用户每个单词一行，随 save_selection 在同一事务中增量维护"""
+    __tablename__ = "user_vocabulary"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    word = Column(String(100), primary_key=True)  # 与 WordClick.word 相同的规范化单词
+    click_count = Column(Integer, nullable=False, default=0)  # 该单词所有选择的点击次数之和
+    first_clicked_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_clicked_at = Column(DateTime(timezone=True), server_default=func.now())
+    mastery_status = Column(String(20), nullable=False, default="生词")
+    # 最近一次点击的记录，列表和详情用它提供选中文本、翻译和出处
+    latest_click_id = Column(Integer, ForeignKey("word_clicks.id", ondelete="SET NULL"), nullable=True)
+    # 间隔重复复习计划（SM-2），新单词立即到期
+    review_interval = Column(Integer, nullable=False, server_default="0")  # 当前复习间隔（天）
+    ease = Column(Float, nullable=False, server_default="2.5")  # 间隔增长系数
+    repetitions = Column(Integer, nullable=False, server_default="0")  # 连续答对次数
+    due_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    latest_click = relationship("WordClick")
+    
+    __table_args__ = (
+        # 生词列表各排序键的键集分页索引（按单词排序直接使用主键）
+        Index('idx_vocab_user_last_clicked', 'user_id', 'last_clicked_at', 'word'),
+        Index('idx_vocab_user_click_count', 'user_id', 'click_count', 'word'),
+        # 复习队列：按到期时间顺序读取；已掌握的单词不再复习，不进入索引
+        Index('idx_vocab_user_due', 'user_id', 'due_at', postgresql_where=text("mastery_status <> '已掌握'")),
+    )
+
+
+class WordIndexEntry(Base):
+    """倒排词索引：某个文件中一个规范化单词出现的页和句子位置"""
+    __tablename__ = "word_index"
+    
+    file_id = Column(Integer, ForeignKey("document_files.id", ondelete="CASCADE"), primary_key=True)
+    word = Column(String(100), primary_key=True)  # 小写、统一撇号后的单词
+    # 扁平存储的 [页码, 句子起点, 句子终点, ...]，每页只记录该词第一次出现的句子，
+    # 偏移相对于 pages.content
+    postings = Column(ARRAY(Integer), nullable=False)
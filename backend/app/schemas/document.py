@@ -14,21 +14,78 @@ class DocumentResponse(DocumentBase):
     user_id: int
     filename: str
     total_pages: int
+    status: str
+    error_message: Optional[str] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class HighlightSpan(BaseModel):
+    """页面中已保存到生词本的短语，偏移基于渲染后的文本（不含标签）"""
+    start: int
+    end: int
+    text: str  # 保存时的选中文本
+
 class PageResponse(BaseModel):
     id: int
     document_id: int
     page_number: int
     content: str
+    char_offset: int = 0
+    highlights: Optional[List[HighlightSpan]] = None  # 仅在 highlight=true 时返回
     
     class Config:
         from_attributes = True
 
+class PageLocation(BaseModel):
+    """全文字符偏移对应的页面位置"""
+    document_id: int
+    page_number: int
+    position: int  # 页内字符位置
+
 class DocumentListResponse(BaseModel):
     documents: List[DocumentResponse]
-    total: int
+    total: Optional[int] = None  # 未请求总数时为空
+    next_cursor: Optional[str] = None  # 没有更多数据时为空
+
+class DocumentDifficulty(BaseModel):
+    """根据词频档案和用户生词本估计的文档难度"""
+    document_id: int
+    title: str
+    total_words: int
+    distinct_words: int
+    unknown_words: int  # 估计的未知单词数（不同单词）
+    unknown_density: float  # 未知词占全部词数的比例
+    mastered_density: float  # 已掌握单词占全部词数的比例
+
+class DocumentDifficultyResponse(BaseModel):
+    documents: List[DocumentDifficulty]
+
 
+class IngestionJobResponse(BaseModel):
+    id: int
+    document_id: Optional[int] = None
+    status: str
+    error_message: Optional[str] = None
+    pages_committed: int = 0
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    owner: Optional[str] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class SearchHit(BaseModel):
+    document_id: int
+    document_title: str
+    page_number: int
+    rank: float
+    snippet: str  # 命中词用 <mark> 标出
+
+class SearchResponse(BaseModel):
+    hits: List[SearchHit]
+    total: int
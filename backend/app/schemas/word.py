@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -13,6 +13,21 @@ class SaveSelectionRequest(BaseModel):
     page_number: int
     position_in_page: Optional[int] = None
 
+class SaveSelectionsRequest(BaseModel):
+    """批量保存选中文本，在一个事务中提交"""
+    selections: List[SaveSelectionRequest] = Field(..., min_length=1, max_length=500)
+
+class BulkWordsRequest(BaseModel):
+    """批量操作的目标：单词列表和/或在某个文档中出现过的全部单词，同时给出时取交集"""
+    words: Optional[List[str]] = Field(None, max_length=5000)
+    document_id: Optional[int] = None
+
+class BulkStatusRequest(BulkWordsRequest):
+    mastery_status: str  # 生词, 熟悉, 已掌握
+
+class BulkOperationResponse(BaseModel):
+    affected: int  # 受影响的单词数
+
 class WordClickResponse(WordClickBase):
     id: int
     user_id: int
@@ -29,12 +44,27 @@ class WordClickResponse(WordClickBase):
     class Config:
         from_attributes = True
 
+class ReviewItem(WordClickResponse):
+    """复习队列中的单词及其复习计划"""
+    review_interval: int  # 天
+    ease: float
+    repetitions: int
+    due_at: datetime
+    last_reviewed_at: Optional[datetime] = None
+
+class ReviewGradeRequest(BaseModel):
+    grade: int = Field(..., ge=0, le=5)  # 0-2: 忘记, 3: 勉强想起, 4: 想起, 5: 轻松想起
+
 class WordDefinition(BaseModel):
     word: str
     phonetic: Optional[str] = None
     meanings: List[dict] = []
     source: str = "dictionary-api"
 
+class LookupRequest(BaseModel):
+    """批量查询释义"""
+    words: List[str] = Field(..., min_length=1, max_length=200)
+
 class WordContext(BaseModel):
     word: str
     document_id: int
@@ -47,5 +77,6 @@ class WordDetailResponse(WordClickResponse):
 
 class WordListResponse(BaseModel):
     words: List[WordClickResponse]
-    total: int
+    total: Optional[int] = None  # 未请求总数时为空
+    next_cursor: Optional[str] = None  # 没有更多数据时为空
 
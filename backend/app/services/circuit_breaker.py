@@ -0,0 +1,57 @@
+import time
+
+
+class CircuitBreaker:
+    """熔断器：连续失败 threshold 次后断开，cooldown 秒内直接拒绝请求
+
+    冷却结束后进入半开状态，只放行一个试探请求：成功则闭合，失败则重新断开。
+    只在事件循环中使用，不加锁。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0  # 连续失败次数
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.rejected = 0  # 断开期间拒绝的请求数
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """是否可以请求上游；半开状态下放行的请求必须以 record_success/record_failure 结束"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.trial_running:
+            self.trial_running = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_running = False
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -1,85 +1,233 @@
+import asyncio
 import httpx
 import logging
-from typing import Optional
-from functools import lru_cache
-from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
 from app.schemas.word import WordDefinition
 from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.local_dictionary import load_definition, parse_api_entry, store_definition
+from app.services.lru_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
-# 简单的内存缓存（生产环境建议使用 Redis）
-_word_cache = {}
-_cache_expiry = {}
+# 释义缓存：容量有上限；查不到的单词和上游错误也缓存，但 TTL 较短。
+# 过期的释义在 DICTIONARY_STALE_TTL 内保留，上游不可用时仍可返回
+cache: LRUCache[WordDefinition] = LRUCache(
+    settings.DICTIONARY_CACHE_SIZE, settings.DICTIONARY_CACHE_TTL, settings.DICTIONARY_STALE_TTL
+)
+# 上游连续失败后熔断，断开期间直接返回缓存或基础信息，不再等待超时
+breaker = CircuitBreaker(settings.DICTIONARY_BREAKER_THRESHOLD, settings.DICTIONARY_BREAKER_COOLDOWN)
 
-async def get_word_definition(word: str) -> Optional[WordDefinition]:
-    """获取单词释义（带缓存）"""
-    word_lower = word.lower()
-    
-    # 检查缓存
-    if word_lower in _word_cache:
-        expiry = _cache_expiry.get(word_lower)
-        if expiry and datetime.now() < expiry:
-            logger.debug(f"Cache hit for word: {word_lower}")
-            return _word_cache[word_lower]
-        else:
-            # 缓存过期，清除
-            _word_cache.pop(word_lower, None)
-            _cache_expiry.pop(word_lower, None)
+# 应用生命周期内共用的 HTTP 客户端：连接池有上限并保持长连接，避免每次查询重新握手
+_client: Optional[httpx.AsyncClient] = None
+# 正在进行的上游查询：同一单词的并发查询共享一次请求
+_inflight: Dict[str, "asyncio.Future[WordDefinition]"] = {}
+
+def get_client() -> httpx.AsyncClient:
+    """获取（必要时创建）词典 HTTP 客户端"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.DICTIONARY_API_URL.rstrip("/") + "/",
+            timeout=httpx.Timeout(settings.DICTIONARY_TIMEOUT, connect=settings.DICTIONARY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.DICTIONARY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DICTIONARY_MAX_KEEPALIVE,
+                keepalive_expiry=settings.DICTIONARY_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+def set_client(client: Optional[httpx.AsyncClient]) -> None:
+    """替换词典客户端，例如指向注入延迟和错误的本地替身服务或使用 MockTransport 测试
+
+    同时重置熔断器，新的上游从闭合状态开始。
+    """
+    global _client, breaker
+    _client = client
+    breaker = CircuitBreaker(settings.DICTIONARY_BREAKER_THRESHOLD, settings.DICTIONARY_BREAKER_COOLDOWN)
+
+async def close_client() -> None:
+    """关闭词典客户端（应用退出时调用）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def _load_local(word_lower: str) -> Optional[WordDefinition]:
+    """查询本地词典（在线程中执行数据库访问，不阻塞事件循环），出错时视为未命中"""
+    try:
+        return await asyncio.to_thread(load_definition, word_lower)
+    except Exception as e:
+        logger.error(f"读取本地词典失败: {e}")
+        return None
+
+async def _store_local(definition: WordDefinition) -> None:
+    """把上游查询结果写入本地词典，失败只记录日志"""
+    try:
+        await asyncio.to_thread(store_definition, definition)
+    except Exception as e:
+        logger.error(f"写入本地词典失败: {e}")
+
+class UpstreamError(Exception):
+    """上游返回 5xx 或 429"""
+
+async def _request(path: str) -> httpx.Response:
+    """在 DICTIONARY_TIMEOUT 内请求上游，必要时发出一个对冲请求
+
+    首个请求超过 DICTIONARY_HEDGE_DELAY 仍未返回时再发一个相同请求，采用先
+    成功的响应并取消另一个。首个请求很快失败时不再发请求，直接抛出错误交给
+    熔断器计数，避免加重过载上游的负担。所有已发出的请求都失败时抛出最后的
+    错误，超出时间预算时抛出 asyncio.TimeoutError。
+    """
+    client = get_client()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.DICTIONARY_TIMEOUT
+    hedge_at = loop.time() + settings.DICTIONARY_HEDGE_DELAY if settings.DICTIONARY_HEDGE_DELAY > 0 else None
+    pending = {asyncio.ensure_future(client.get(path))}
+    error: Optional[Exception] = None
+    try:
+        while pending:
+            now = loop.time()
+            if now >= deadline:
+                raise asyncio.TimeoutError(f"超过 {settings.DICTIONARY_TIMEOUT} 秒")
+            if hedge_at is not None and now >= hedge_at:
+                pending.add(asyncio.ensure_future(client.get(path)))
+                hedge_at = None
+                continue
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = await asyncio.wait(pending, timeout=wake - now, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    response = task.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if response.status_code >= 500 or response.status_code == 429:
+                    error = UpstreamError(f"HTTP {response.status_code}")
+                    continue
+                return response
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _fetch_upstream(word_lower: str, prefetch: bool = False) -> Optional[WordDefinition]:
+    """通过熔断器查询上游：查到返回释义，上游确认查不到返回 None，出错或熔断时抛出异常
+
+    prefetch 的请求只在熔断器闭合时发出，结果不计入熔断器，后台预取的失败
+    不会让交互式查询熔断。
+    """
+    if prefetch:
+        if breaker.state != breaker.CLOSED:
+            raise UpstreamError("熔断中")
+        response = await _request(quote(word_lower, safe=""))
+        return parse_api_entry(word_lower, response.json()) if response.status_code == 200 else None
+    if not breaker.allow():
+        raise UpstreamError("熔断中")
+    try:
+        response = await _request(quote(word_lower, safe=""))
+        result = parse_api_entry(word_lower, response.json()) if response.status_code == 200 else None
+    except BaseException:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+async def _fetch_definition(word_lower: str, prefetch: bool = False) -> WordDefinition:
+    """依次查询本地词典和上游并缓存释义，失败时返回并缓存旧释义或基础信息（不抛出异常）
+
+    上游查询到的释义写入本地词典，重启或新部署的实例不必重新请求上游。
+    预取（prefetch）出错时不写缓存，不影响之后的交互式查询。
+    """
+    result = await _load_local(word_lower)
+    if result is not None:
+        cache.set(word_lower, result)
+        return result
     
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0, connect=2.0)) as client:
-            url = f"{settings.DICTIONARY_API_URL}/{word_lower}"
-            response = await client.get(url)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list) and len(data) > 0:
-                    entry = data[0]
-                    
-                    # 提取音标
-                    phonetic = entry.get("phonetic", "")
-                    if not phonetic and "phonetics" in entry:
-                        for ph in entry["phonetics"]:
-                            if ph.get("text"):
-                                phonetic = ph["text"]
-                                break
-                    
-                    # 提取释义
-                    meanings = []
-                    if "meanings" in entry:
-                        for meaning in entry["meanings"]:
-                            part_of_speech = meaning.get("partOfSpeech", "")
-                            definitions = []
-                            for def_item in meaning.get("definitions", []):
-                                definitions.append({
-                                    "definition": def_item.get("definition", ""),
-                                    "example": def_item.get("example", "")
-                                })
-                            meanings.append({
-                                "partOfSpeech": part_of_speech,
-                                "definitions": definitions
-                            })
-                    
-                    result = WordDefinition(
-                        word=word_lower,
-                        phonetic=phonetic,
-                        meanings=meanings
-                    )
-                    
-                    # 缓存结果（24小时）
-                    _word_cache[word_lower] = result
-                    _cache_expiry[word_lower] = datetime.now() + timedelta(hours=24)
-                    
-                    logger.debug(f"Cached word definition: {word_lower}")
-                    return result
+        result = await _fetch_upstream(word_lower, prefetch)
+        if result is not None:
+            cache.set(word_lower, result)
+            await _store_local(result)
+            logger.debug(f"Cached word definition: {word_lower}")
+            return result
+        ttl = settings.DICTIONARY_NEGATIVE_TTL
     except Exception as e:
-        logger.error(f"获取单词释义失败: {e}")
+        if prefetch:
+            logger.debug(f"预取单词释义失败: {word_lower}: {e!r}")
+            return WordDefinition(word=word_lower, meanings=[], source="fallback")
+        logger.warning(f"获取单词释义失败: {word_lower}: {e!r}")
+        ttl = settings.DICTIONARY_ERROR_TTL
+        # 上游不可用时继续使用过期的释义，稍后再尝试刷新
+        stale = cache.get_stale(word_lower)
+        if stale is not None and stale.source != "fallback":
+            cache.set(word_lower, stale, ttl=ttl)
+            return stale
     
-    # 如果API失败，返回基础信息
-    return WordDefinition(
+    # 查不到或出错时返回基础信息，短时间内不再请求上游
+    result = WordDefinition(
         word=word_lower,
         meanings=[],
         source="fallback"
     )
+    cache.set(word_lower, result, ttl=ttl)
+    return result
+
+def _submit_fetch(word_lower: str, prefetch: bool = False) -> "asyncio.Future[WordDefinition]":
+    """发起（或复用正在进行的）查询，同一单词的并发查询共享一次请求"""
+    future = _inflight.get(word_lower)
+    if future is None:
+        future = asyncio.ensure_future(_fetch_definition(word_lower, prefetch))
+        _inflight[word_lower] = future
+        future.add_done_callback(lambda _: _inflight.pop(word_lower, None))
+    return future
+
+async def get_word_definition(word: str, prefetch: bool = False) -> Optional[WordDefinition]:
+    """获取单词释义（内存缓存 -> 本地词典 -> 词典 API）
+
+    缓存的释义已过期时立即返回旧值，并在后台刷新。未命中内存缓存时，同一单词
+    的并发查询合并为一次上游请求；某个调用方被取消不会中断共享的请求。
+    等待时间不超过 DICTIONARY_TIMEOUT，熔断期间不等待上游。prefetch 见 _fetch_upstream。
+    """
+    word_lower = word.lower()
+    
+    # 检查缓存
+    cached = cache.get(word_lower)
+    if cached is not None:
+        logger.debug(f"Cache hit for word: {word_lower}")
+        return cached
+    
+    stale = cache.get_stale(word_lower)
+    if stale is not None and stale.source != "fallback":
+        _submit_fetch(word_lower, prefetch)
+        return stale
+    
+    return await asyncio.shield(_submit_fetch(word_lower, prefetch))
+
+async def get_word_definitions(words: Iterable[str], concurrency: Optional[int] = None,
+                               prefetch: bool = False) -> List[WordDefinition]:
+    """批量获取释义，按去重后的小写单词顺序返回
+
+    缓存命中的单词直接返回；其余单词并发查询，同时进行的查询不超过
+    concurrency 个（默认 DICTIONARY_BATCH_CONCURRENCY），避免一个批量请求占满连接池。
+    """
+    unique = list(dict.fromkeys(word.lower() for word in words))
+    semaphore = asyncio.Semaphore(concurrency or settings.DICTIONARY_BATCH_CONCURRENCY)
 
+    async def lookup(word_lower: str) -> WordDefinition:
+        # 用不计入统计的 in 判断是否命中，每个单词在缓存统计中只记一次
+        if word_lower in cache:
+            return await get_word_definition(word_lower, prefetch)
+        async with semaphore:
+            return await get_word_definition(word_lower, prefetch)
+
+    return list(await asyncio.gather(*(lookup(word_lower) for word_lower in unique)))
+
+async def prefetch_definitions(words: List[str]) -> None:
+    """后台预取释义以预热缓存（页面响应发出后执行），失败只记录日志"""
+    try:
+        await get_word_definitions(words, settings.DICTIONARY_PREFETCH_CONCURRENCY, prefetch=True)
+    except Exception as e:
+        logger.error(f"预取单词释义失败: {e}")
@@ -1,143 +1,92 @@
 import os
-import re
 import logging
-from typing import List, Tuple, Optional
-from PyPDF2 import PdfReader
+from itertools import islice
+from typing import Iterator, Optional
 import ebooklib
 from ebooklib import epub
-
-# OCR相关导入（可选）
-try:
-    from pdf2image import convert_from_path
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    logging.warning("OCR libraries not available. Image PDF support will be limited.")
+from app.core.config import settings
+from app.services.ocr import OCR_AVAILABLE, ocr_pdf_pages
+from app.services.html_text import extract_html_text
+from app.services.markdown import convert_markdown
+from app.services.paginator import paginate
+from app.services.pdf_extract import extract_pdf_text
 
 logger = logging.getLogger(__name__)
 
-def parse_text_file(file_path: str) -> Tuple[str, List[str]]:
-    """解析纯文本文件，支持Markdown格式（加粗、斜体）"""
+def parse_text_file(file_path: str) -> Iterator[str]:
+    """解析纯文本文件，支持Markdown格式（标题、列表、加粗、斜体），逐页产出"""
     with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 处理Markdown格式：将Markdown转换为HTML
-    # 加粗：**text** 或 __text__ -> <strong>text</strong>
-    content = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content)
-    content = re.sub(r'__(.+?)__', r'<strong>\1</strong>', content)
-    
-    # 斜体：*text* 或 _text_ -> <em>text</em>
-    # 注意：需要避免与加粗冲突，先处理加粗再处理斜体
-    content = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<em>\1</em>', content)
-    content = re.sub(r'(?<!_)_(?!_)(.+?)(?<!_)_(?!_)', r'<em>\1</em>', content)
-    
-    # 简单分页：每500个字符一页
-    pages = []
-    page_size = 500
-    for i in range(0, len(content), page_size):
-        pages.append(content[i:i+page_size])
-    
-    return content, pages
+        # 逐行转换Markdown，并按段落/句子边界分页，不会切断单词和标签
+        yield from paginate(convert_markdown(f), settings.PAGE_TARGET_SIZE)
 
-def parse_pdf(file_path: str) -> Tuple[str, List[str]]:
-    """解析PDF文件，支持文本PDF和图片PDF（OCR）"""
-    reader = PdfReader(file_path)
-    full_text = ""
-    pages = []
-    total_pages = len(reader.pages)
-    
-    # 首先尝试提取文本
-    text_pages = []
-    for page in reader.pages:
-        page_text = page.extract_text()
-        text_pages.append(page_text)
-        if page_text:
-            full_text += page_text + "\n"
-            pages.append(page_text)
+def parse_pdf(file_path: str, skip_pages: int = 0) -> Iterator[str]:
+    """解析PDF文件，支持文本PDF和图片PDF（OCR），跳过前 skip_pages 页后逐页产出"""
+    # 首先尝试提取文本（页数较多时按页区间并行提取）
+    text_pages = [page.text for page in extract_pdf_text(file_path)]
+    total_pages = len(text_pages)
     
     # 检查是否大部分页面都没有文本（可能是图片PDF）
-    empty_pages = sum(1 for text in text_pages if not text or len(text.strip()) < 10)
+    empty_pages = sum(1 for text in text_pages if len(text.strip()) < 10)
     is_image_pdf = empty_pages > total_pages * 0.5  # 如果超过50%的页面没有文本，认为是图片PDF
     
+    if not is_image_pdf:
+        pages = [text for text in text_pages if text]
+        # 确保至少有页面结构
+        if not pages:
+            pages = [""] * total_pages
+        yield from pages[skip_pages:]
+        return
+    
     # 如果是图片PDF且OCR可用，使用OCR识别
-    if is_image_pdf and OCR_AVAILABLE:
+    if OCR_AVAILABLE:
         logger.info(f"Detected image PDF, using OCR for {total_pages} pages")
+        # 逐页光栅化并在进程池中并行识别，结果按页码顺序返回
+        # OCR 结果与页面一一对应，断点续传时直接从检查点之后的页开始识别
+        yielded = skip_pages
+        extracted = 0
         try:
-            # 将PDF转换为图片
-            images = convert_from_path(file_path, dpi=300)
-            
-            # 重新处理所有页面
-            full_text = ""
-            pages = []
-            
-            for i, image in enumerate(images):
-                # 使用OCR识别文本
-                try:
-                    # 配置OCR语言（英文）
-                    ocr_text = pytesseract.image_to_string(image, lang='eng')
-                    
-                    # 清理OCR结果
-                    ocr_text = ocr_text.strip()
-                    
-                    if ocr_text:
-                        full_text += ocr_text + "\n"
-                        pages.append(ocr_text)
-                        logger.info(f"OCR extracted {len(ocr_text)} characters from page {i+1}")
-                    else:
-                        # 如果OCR没有提取到文本，使用原文本（如果有）或空字符串
-                        pages.append(text_pages[i] if i < len(text_pages) else "")
-                except Exception as e:
-                    logger.warning(f"OCR failed for page {i+1}: {str(e)}")
-                    # OCR失败时使用原文本
-                    pages.append(text_pages[i] if i < len(text_pages) else "")
-            
-            logger.info(f"OCR completed. Extracted text from {len([p for p in pages if p])} pages")
+            for i, ocr_text in ocr_pdf_pages(file_path, total_pages, first_page=skip_pages + 1):
+                yielded += 1
+                if ocr_text:
+                    extracted += 1
+                    yield ocr_text
+                else:
+                    # OCR失败、超时或没有提取到文本时，使用原文本
+                    yield text_pages[i]
+            logger.info(f"OCR completed. Extracted text from {extracted} pages")
         except Exception as e:
             logger.error(f"OCR processing failed: {str(e)}")
-            # OCR失败时使用原文本
-            if not pages:
-                pages = text_pages
-                full_text = "\n".join(text_pages)
-    elif is_image_pdf and not OCR_AVAILABLE:
+            # OCR失败时使用剩余页面的原文本
+            yield from text_pages[yielded:]
+    else:
         logger.warning("Image PDF detected but OCR is not available. Install Tesseract OCR for full support.")
-        # 如果没有OCR，至少返回空页面结构
-        if not pages:
-            pages = [""] * total_pages
-    
-    # 确保至少有一些内容
-    if not pages:
-        pages = [""] * total_pages
-    
-    return full_text, pages
+        # 如果没有OCR，至少返回页面结构
+        yield from text_pages[skip_pages:]
 
-def parse_epub(file_path: str) -> Tuple[str, List[str]]:
-    """解析EPUB文件"""
+def parse_epub(file_path: str) -> Iterator[str]:
+    """解析EPUB文件，按阅读顺序逐章提取正文并分页，逐页产出"""
     book = epub.read_epub(file_path)
-    full_text = ""
-    pages = []
     
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            content = item.get_content().decode('utf-8')
-            # 简单提取文本（去除HTML标签）
-            text = re.sub(r'<[^>]+>', '', content)
-            text = re.sub(r'\s+', ' ', text).strip()
-            if text:
-                full_text += text + "\n"
-                pages.append(text)
-    
-    return full_text, pages
+    for entry in book.spine:
+        idref = entry[0] if isinstance(entry, tuple) else entry
+        item = book.get_item_with_id(idref)
+        if item is None or item.get_type() != ebooklib.ITEM_DOCUMENT:
+            continue
+        content = item.get_content().decode('utf-8', errors='replace')
+        # 流式提取正文（保留段落结构），每章从新的一页开始
+        yield from paginate(extract_html_text(content), settings.PAGE_TARGET_SIZE)
+
+def parse_document(file_path: str, file_type: Optional[str], skip_pages: int = 0) -> Iterator[str]:
+    """根据文件类型解析文档，返回按页码顺序产出页面内容的迭代器
 
-def parse_document(file_path: str, file_type: str) -> Tuple[str, List[str]]:
-    """根据文件类型解析文档"""
+    skip_pages 用于断点续传：跳过已经写入数据库的前若干页。
+    """
     if file_type == "text/plain" or file_path.endswith('.txt'):
-        return parse_text_file(file_path)
+        return islice(parse_text_file(file_path), skip_pages, None)
     elif file_type == "application/pdf" or file_path.endswith('.pdf'):
-        return parse_pdf(file_path)
+        return parse_pdf(file_path, skip_pages)
     elif file_type == "application/epub+zip" or file_path.endswith('.epub'):
-        return parse_epub(file_path)
+        return islice(parse_epub(file_path), skip_pages, None)
     else:
         raise ValueError(f"不支持的文件类型: {file_type}")
 
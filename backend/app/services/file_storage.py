@@ -0,0 +1,99 @@
+import os
+import hashlib
+import tempfile
+import logging
+from typing import NamedTuple
+from fastapi import UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FileTooLargeError(ValueError):
+    """上传文件超过 MAX_FILE_SIZE"""
+
+
+class StoredUpload(NamedTuple):
+    """已写入临时文件的上传文件"""
+    file_path: str  # 按内容哈希命名的目标路径
+    content_hash: str  # SHA-256 十六进制摘要
+    size: int
+    temp_path: str  # 由 place_upload 移动到目标路径，或由 discard_upload 删除
+
+
+def content_path(content_hash: str, filename: str) -> str:
+    """内容寻址的存储路径：UPLOAD_DIR/<哈希前两位>/<哈希><扩展名>"""
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join(settings.UPLOAD_DIR, content_hash[:2], f"{content_hash}{ext}")
+
+
+async def save_upload_file(file: UploadFile) -> StoredUpload:
+    """以固定大小分块把上传文件写入临时文件，并在写入的同时计算内容哈希
+
+    写入 UPLOAD_DIR 下的临时文件，边写边检查大小，超限立即中止。调用方在
+    持有内容锁时用 place_upload 把它原子重命名到按内容哈希命名的路径。
+    内容相同的文件只保存一份，不同文件即使同名也不会互相覆盖。单次上传的
+    内存占用与文件大小无关。
+    """
+    max_size = settings.MAX_FILE_SIZE
+    chunk_size = settings.UPLOAD_CHUNK_SIZE
+
+    # 客户端已声明大小时，无需读取任何内容即可拒绝
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_size:
+        raise FileTooLargeError(f"文件大小超过限制: {declared_size} > {max_size}")
+
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    # 临时文件与目标文件在同一文件系统，保证 os.replace 是原子操作
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-", suffix=".part")
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_size:
+                    raise FileTooLargeError(f"文件大小超过限制: > {max_size}")
+                digest.update(chunk)
+                buffer.write(chunk)
+            buffer.flush()
+            os.fsync(buffer.fileno())
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    content_hash = digest.hexdigest()
+    return StoredUpload(content_path(content_hash, file.filename or ""), content_hash, written, tmp_path)
+
+
+def lock_content(db: Session, content_hash: str) -> None:
+    """在当前事务中对内容哈希加锁，提交或回滚时释放
+
+    上传时检查磁盘文件、创建文件记录和文档记录，与清理时检查引用、删除
+    文件记录和磁盘文件都在这个锁内进行，清理不会删掉刚被新上传复用的文件。
+    """
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext(content_hash))))
+
+
+def place_upload(upload: StoredUpload, file_path: str) -> None:
+    """把临时文件移动到 file_path；相同内容已经存在时丢弃临时文件（需持有内容锁）"""
+    if os.path.exists(file_path):
+        os.remove(upload.temp_path)
+        return
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    os.replace(upload.temp_path, file_path)
+    logger.info(f"上传文件已保存: {file_path} ({upload.size} bytes)")
+
+
+def discard_upload(upload: StoredUpload) -> None:
+    """删除尚未放置的临时文件"""
+    if os.path.exists(upload.temp_path):
+        os.remove(upload.temp_path)
@@ -0,0 +1,214 @@
+import re
+import html
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.word import WordClick
+
+MAX_PHRASE_LENGTH = 500
+
+# 页面内容中的标签和 HTML 实体，渲染后标签不占字符、实体占一个字符
+_MARKUP = re.compile(r"<[^>]*>|&#?\w+;")
+
+def _fold(ch: str) -> str:
+    """逐字符小写并把空白统一为空格，保持长度不变以便偏移一一对应"""
+    if ch.isspace():
+        return " "
+    lower = ch.lower()
+    return lower if len(lower) == 1 else ch
+
+def normalize_phrase(text: str) -> str:
+    """匹配用的规范化短语：小写，连续空白压缩为一个空格"""
+    return "".join(_fold(ch) for ch in " ".join(text.split()))
+
+def rendered_text(content: str) -> str:
+    """页面 HTML 渲染后的文本（去掉标签、还原实体），偏移与前端文本节点的偏移一致"""
+    pieces = []
+    last = 0
+    for match in _MARKUP.finditer(content):
+        pieces.append(content[last:match.start()])
+        token = match.group(0)
+        if token[0] == "&":
+            pieces.append(html.unescape(token))
+        last = match.end()
+    pieces.append(content[last:])
+    return "".join(pieces)
+
+class PhraseMatcher:
+    """Aho-Corasick 多模式匹配器，可增量添加和删除短语
+
+    Trie 节点用并行列表存储。添加短语只插入 trie 路径，删除只清除终止标记，
+    失配链接在下一次匹配前按需用一次 BFS 重建（与短语总长度成线性）。匹配
+    是对文本的一次线性扫描，与短语数量无关。
+    """
+
+    def __init__(self, phrases: Iterable[str] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._length: List[int] = [0]     # 以该节点结束的短语长度，0 表示不是短语终点
+        self._output: List[int] = [0]     # 失配链上最近的短语终点节点
+        self._phrases: Dict[str, str] = {}  # 规范化短语 -> 原始文本
+        self._dirty = False
+        self.lock = threading.Lock()
+        for phrase in phrases:
+            self.add(phrase)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def add(self, phrase: str) -> None:
+        key = normalize_phrase(phrase)
+        if not key or len(key) > MAX_PHRASE_LENGTH or key in self._phrases:
+            return
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._length.append(0)
+                self._output.append(0)
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._length[node] = len(key)
+        self._phrases[key] = phrase
+        self._dirty = True
+
+    def remove(self, phrase: str) -> None:
+        key = normalize_phrase(phrase)
+        if self._phrases.pop(key, None) is None:
+            return
+        node = 0
+        for ch in key:
+            node = self._goto[node][ch]
+        self._length[node] = 0
+        self._dirty = True
+
+    def _build(self) -> None:
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[child] = fail
+                self._output[child] = fail if self._length[fail] else self._output[fail]
+                queue.append(child)
+        self._dirty = False
+
+    def find_all(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """产出文本中所有（可能重叠的）匹配 (起点, 终点, 原始短语)"""
+        if self._dirty:
+            self._build()
+        goto, fail, length, output = self._goto, self._fail, self._length, self._output
+        node = 0
+        for i, ch in enumerate(text):
+            ch = _fold(ch)
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            match = node if length[node] else output[node]
+            while match:
+                end = i + 1
+                start = end - length[match]
+                yield start, end, match
+                match = output[match]
+
+    def phrase_at(self, text: str, start: int, end: int) -> str:
+        return self._phrases.get(normalize_phrase(text[start:end]), text[start:end])
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    """匹配两端不能切在单词中间（例如 cat 不匹配 category）"""
+    if start > 0 and text[start].isalnum() and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end - 1].isalnum() and text[end].isalnum():
+        return False
+    return True
+
+def find_spans(matcher: PhraseMatcher, text: str) -> List[dict]:
+    """在渲染文本中查找已保存的短语，返回不重叠的 {start, end, text}，优先最左、最长"""
+    best: Dict[int, int] = {}  # 起点 -> 最长终点
+    with matcher.lock:
+        for start, end, _ in matcher.find_all(text):
+            if end > best.get(start, -1) and _is_word_boundary(text, start, end):
+                best[start] = end
+        spans = []
+        covered = 0
+        for start in sorted(best):
+            if start >= covered:
+                end = best[start]
+                spans.append({"start": start, "end": end, "text": matcher.phrase_at(text, start, end)})
+                covered = end
+    return spans
+
+# 每个用户一个匹配器，按最近使用淘汰；过期后从数据库重建，兼顾多进程部署下的一致性
+_matchers: "OrderedDict[int, Tuple[float, PhraseMatcher]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cached(user_id: int) -> Optional[PhraseMatcher]:
+    with _cache_lock:
+        entry = _matchers.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        _matchers.move_to_end(user_id)
+        return entry[1]
+
+def get_matcher(db: Session, user_id: int) -> PhraseMatcher:
+    """获取用户的短语匹配器，未缓存时从 word_clicks 构建"""
+    matcher = _cached(user_id)
+    if matcher is not None:
+        return matcher
+    phrases = db.query(WordClick.selected_text).filter(
+        WordClick.user_id == user_id,
+        WordClick.selected_text.isnot(None)
+    ).distinct()
+    matcher = PhraseMatcher(phrase for (phrase,) in phrases)
+    with _cache_lock:
+        _matchers[user_id] = (time.monotonic() + settings.HIGHLIGHT_CACHE_TTL, matcher)
+        _matchers.move_to_end(user_id)
+        while len(_matchers) > settings.HIGHLIGHT_CACHE_USERS:
+            _matchers.popitem(last=False)
+    return matcher
+
+def add_phrases(user_id: int, phrases: Iterable[str]) -> None:
+    """保存选择并提交后调用：把新短语加入已缓存的匹配器"""
+    matcher = _cached(user_id)
+    if matcher is None:
+        return
+    with matcher.lock:
+        for phrase in phrases:
+            matcher.add(phrase)
+
+def remove_phrases(db: Session, user_id: int, phrases: Iterable[str]) -> None:
+    """删除点击记录并提交后调用：移除不再被任何点击记录引用的短语"""
+    matcher = _cached(user_id)
+    phrases = {phrase for phrase in phrases if phrase}
+    if matcher is None or not phrases:
+        return
+    remaining = {
+        normalize_phrase(phrase) for (phrase,) in db.query(WordClick.selected_text).filter(
+            WordClick.user_id == user_id,
+            WordClick.selected_text.in_(phrases)
+        ).distinct()
+    }
+    with matcher.lock:
+        for phrase in phrases:
+            if normalize_phrase(phrase) not in remaining:
+                matcher.remove(phrase)
+
+def page_highlights(db: Session, user_id: int, content: str) -> List[dict]:
+    """页面中已保存短语的位置，偏移基于渲染后的文本"""
+    matcher = get_matcher(db, user_id)
+    if not len(matcher):
+        return []
+    return find_spans(matcher, rendered_text(content))
@@ -0,0 +1,113 @@
+from html import escape
+from html.parser import HTMLParser
+from typing import Iterator, List
+
+# 块级元素：前后各产生一个段落分隔
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+# 内容不输出的元素
+SKIP_TAGS = {"head", "script", "style", "svg", "title"}
+# 保留的行内强调，映射为与 Markdown 转换一致的标签
+INLINE_TAGS = {"b": "strong", "strong": "strong", "i": "em", "em": "em"}
+
+class HTMLTextExtractor(HTMLParser):
+    """增量 HTML 文本提取器
+
+    可以分块 feed，随时用 drain() 取出已提取的文本。块级元素转换为空行
+    分隔的段落，文本中的空白压缩为单个空格，加粗/斜体保留为
+    <strong>/<em>，其余标签丢弃，正文中的 < 和 & 重新转义。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._pieces: List[str] = []
+        self._skip_depth = 0
+        self._at_block_start = True   # 当前段落还没有任何输出
+        self._pending_space = False   # 上一段文本以空白结尾
+        self._open_inline: List[str] = []
+
+    def _close_inline(self):
+        while self._open_inline:
+            self._pieces.append(f"</{INLINE_TAGS[self._open_inline.pop()]}>")
+
+    def _block_break(self):
+        # 未闭合的行内元素不跨段落
+        self._close_inline()
+        if not self._at_block_start:
+            self._pieces.append("\n\n")
+            self._at_block_start = True
+        self._pending_space = False
+
+    def _flush_space(self):
+        if self._pending_space and not self._at_block_start:
+            self._pieces.append(" ")
+        self._pending_space = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag in BLOCK_TAGS:
+            self._block_break()
+        elif tag == "br":
+            if not self._at_block_start:
+                self._pieces.append("\n")
+            self._pending_space = False
+        elif tag in INLINE_TAGS:
+            self._flush_space()
+            self._pieces.append(f"<{INLINE_TAGS[tag]}>")
+            self._open_inline.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif self._skip_depth:
+            return
+        elif tag in BLOCK_TAGS:
+            self._block_break()
+        elif tag in INLINE_TAGS and tag in self._open_inline:
+            # 闭合到匹配的元素为止，保证输出的标签成对
+            while self._open_inline:
+                opened = self._open_inline.pop()
+                self._pieces.append(f"</{INLINE_TAGS[opened]}>")
+                if opened == tag:
+                    break
+
+    def handle_data(self, data):
+        if self._skip_depth or not data:
+            return
+        text = " ".join(data.split())
+        if data[0].isspace():
+            self._pending_space = True
+        if text:
+            self._flush_space()
+            self._pieces.append(escape(text, quote=False))
+            self._at_block_start = False
+            self._pending_space = data[-1].isspace()
+
+    def close(self):
+        super().close()
+        self._close_inline()
+
+    def drain(self) -> str:
+        """取出目前为止提取到的文本"""
+        text = "".join(self._pieces)
+        self._pieces = []
+        return text
+
+def extract_html_text(html: str, chunk_size: int = 8192) -> Iterator[str]:
+    """分块解析 HTML，逐块产出提取出的文本，可直接交给 paginate"""
+    parser = HTMLTextExtractor()
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+        text = parser.drain()
+        if text:
+            yield text
+    parser.close()
+    text = parser.drain()
+    if text:
+        yield text
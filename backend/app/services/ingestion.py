@@ -0,0 +1,531 @@
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document, DocumentFile, DocumentStatus, Page
+from app.models.job import IngestionJob, JobStatus
+from app.services.document_parser import parse_document
+from app.services.vocabulary_profile import build_profile, count_stored_pages, counting_pages
+from app.services.word_index import index_pages
+
+logger = logging.getLogger(__name__)
+
+# 本进程的标识，记录在领取的任务上。同一主机上 pid 可能被新进程复用
+# （例如容器重启后仍是同一个 pid），所以附加每次启动不同的标识
+_HOSTNAME = socket.gethostname()
+PROCESS_ID = f"{_HOSTNAME}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLostError(RuntimeError):
+    """任务的心跳已被其他进程接管"""
+
+# 本地解析线程池：解析在工作线程中进行，不阻塞事件循环
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """获取（必要时创建）解析线程池"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.INGESTION_WORKERS,
+            thread_name_prefix="ingestion"
+        )
+    return _executor
+
+def shutdown_executor(wait: bool = True) -> None:
+    """关闭解析线程池（应用退出时调用）"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+
+def submit_ingestion_job(job_id: int, orphaned_owner: Optional[str] = None) -> None:
+    """把解析任务提交到线程池，orphaned_owner 为已退出的进程时可直接接管它的运行中任务"""
+    get_executor().submit(run_ingestion_job, job_id, orphaned_owner)
+    logger.info(f"解析任务已入队: job_id={job_id}")
+
+
+class _Heartbeat(threading.Thread):
+    """在后台定期刷新任务心跳，覆盖文本提取、OCR 等长时间不产出页面的阶段
+
+    使用独立的数据库会话；只在本进程仍持有任务时刷新，任务被重试或被其他
+    进程接管后停止（解析线程在下一次写入时发现）。
+    """
+
+    def __init__(self, job_id: int):
+        super().__init__(name=f"ingestion-heartbeat-{job_id}", daemon=True)
+        self.job_id = job_id
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(settings.INGESTION_HEARTBEAT_INTERVAL):
+            db = SessionLocal()
+            try:
+                result = db.execute(
+                    update(IngestionJob)
+                    .where(
+                        IngestionJob.id == self.job_id,
+                        IngestionJob.owner == PROCESS_ID,
+                        IngestionJob.status == JobStatus.RUNNING
+                    )
+                    .values(heartbeat_at=datetime.now(timezone.utc))
+                )
+                db.commit()
+                if result.rowcount == 0:
+                    logger.warning(f"解析任务已不再由本进程持有: job_id={self.job_id}")
+                    return
+            except Exception as e:
+                db.rollback()
+                logger.error(f"刷新任务心跳失败: job_id={self.job_id}, 错误: {str(e)}")
+            finally:
+                db.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+def persist_pages(db: Session, file_id: int, pages: Iterable[str],
+                  start_page: int = 0, start_offset: int = 0,
+                  on_checkpoint: Optional[Callable[[int], None]] = None) -> int:
+    """按批次批量插入页面，返回页面总数（包含 start_page 之前已写入的页）
+
+    解析器逐页产出内容，这里每攒够 PAGE_INSERT_BATCH_SIZE 页（或距上次写入
+    超过 PAGE_CHECKPOINT_INTERVAL 秒，避免慢速 OCR 长时间不落盘）执行一次
+    executemany 插入，内存中最多只保留一个批次，并在同一事务中更新倒排词索引。
+    同时记录每页在全文中的起始偏移（之前所有页面长度之和），用于把全文偏移
+    映射到页。每批插入后
+    调用 on_checkpoint(已写入页数)，由调用方在同一事务中记录检查点并提交。
+    """
+    batch_size = settings.PAGE_INSERT_BATCH_SIZE
+    interval = settings.PAGE_CHECKPOINT_INTERVAL
+    batch = []
+    page_count = start_page
+    char_offset = start_offset
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal batch, last_flush
+        if batch:
+            db.execute(insert(Page), batch)
+            index_pages(db, file_id, batch)
+            batch = []
+        if on_checkpoint is not None:
+            on_checkpoint(page_count)
+        last_flush = time.monotonic()
+
+    for page_content in pages:
+        page_count += 1
+        batch.append({
+            "file_id": file_id,
+            "page_number": page_count,
+            "content": page_content,
+            "char_offset": char_offset
+        })
+        char_offset += len(page_content)
+        if len(batch) >= batch_size or time.monotonic() - last_flush >= interval:
+            flush()
+    if batch:
+        flush()
+    return page_count
+
+def _resume_offset(db: Session, file_id: int, checkpoint: int) -> int:
+    """检查点之后第一页的全文起始偏移"""
+    if checkpoint <= 0:
+        return 0
+    row = db.query(Page.char_offset, func.char_length(Page.content)).filter(
+        Page.file_id == file_id,
+        Page.page_number == checkpoint
+    ).first()
+    return row[0] + row[1] if row else 0
+
+def _fenced_update(db: Session, job_id: int, **values) -> None:
+    """只在本进程仍持有任务时更新任务（不提交），否则抛出 LeaseLostError
+
+    任务被重试或被其他进程接管后 owner 不再是本进程，这里的更新不会生效，
+    同一事务中的页面写入也随之回滚。UPDATE 同时锁住任务行直到提交。
+    """
+    result = db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            IngestionJob.owner == PROCESS_ID,
+            IngestionJob.status == JobStatus.RUNNING
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise LeaseLostError(f"任务已不再由本进程持有: job_id={job_id}")
+
+def _ingest_file(db: Session, job: IngestionJob, stored: DocumentFile) -> None:
+    """从检查点开始解析文件并分批写入页面记录，同时建立词频档案"""
+    checkpoint = job.pages_committed or 0
+    if checkpoint:
+        logger.info(f"从检查点恢复解析: job_id={job.id}, 已完成 {checkpoint} 页")
+    # 清理检查点之后可能残留的页面
+    db.query(Page).filter(
+        Page.file_id == stored.id,
+        Page.page_number > checkpoint
+    ).delete(synchronize_session=False)
+    start_offset = _resume_offset(db, stored.id, checkpoint)
+
+    def save_checkpoint(page_count: int) -> None:
+        _fenced_update(db, job.id, pages_committed=page_count, heartbeat_at=datetime.now(timezone.utc))
+        stored.total_pages = page_count
+        db.commit()
+
+    # 词频在写入页面的同一遍中统计，检查点之前的页从数据库补上
+    word_counts = Counter()
+    if checkpoint:
+        count_stored_pages(db, stored.id, word_counts, up_to_page=checkpoint)
+    pages = parse_document(stored.file_path, stored.content_type, skip_pages=checkpoint)
+    stored.total_pages = persist_pages(
+        db, stored.id, counting_pages(pages, word_counts),
+        start_page=checkpoint,
+        start_offset=start_offset,
+        on_checkpoint=save_checkpoint
+    )
+    stored.vocabulary_profile = build_profile(word_counts)
+
+def set_file_status(db: Session, stored: DocumentFile, status: str,
+                    error_message: Optional[str] = None) -> None:
+    """更新文件及所有引用它的文档的解析状态（不提交）
+
+    解析结束（完成或失败）时，等待该文件的任务随之结束。
+    """
+    stored.status = status
+    db.query(Document).filter(Document.file_id == stored.id).update({
+        Document.status: status,
+        Document.error_message: error_message,
+        Document.total_pages: stored.total_pages or 0
+    }, synchronize_session=False)
+    if status in (DocumentStatus.READY, DocumentStatus.FAILED):
+        db.query(IngestionJob).filter(
+            IngestionJob.file_id == stored.id,
+            IngestionJob.status == JobStatus.WAITING
+        ).update({
+            IngestionJob.status: JobStatus.SUCCEEDED if status == DocumentStatus.READY else JobStatus.FAILED,
+            IngestionJob.error_message: error_message,
+            IngestionJob.pages_committed: stored.total_pages or 0,
+            IngestionJob.finished_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+
+def _running_stalled_since(stalled_before: datetime):
+    """运行中但心跳早于 stalled_before（执行进程已退出）的任务"""
+    return and_(
+        IngestionJob.status == JobStatus.RUNNING,
+        or_(IngestionJob.heartbeat_at.is_(None), IngestionJob.heartbeat_at < stalled_before)
+    )
+
+def _claimable(orphaned_owner: Optional[str] = None):
+    """可领取的任务：排队中的任务、心跳超时的运行中任务，或由已退出的
+    orphaned_owner 持有的运行中任务
+    """
+    stalled_before = datetime.now(timezone.utc) - timedelta(seconds=settings.INGESTION_STALL_SECONDS)
+    claimable = [
+        IngestionJob.status == JobStatus.QUEUED,
+        _running_stalled_since(stalled_before)
+    ]
+    if orphaned_owner is not None:
+        claimable.append(and_(
+            IngestionJob.status == JobStatus.RUNNING,
+            IngestionJob.owner == orphaned_owner
+        ))
+    return or_(*claimable)
+
+def _fail_exhausted(db: Session, job_id: int, orphaned_owner: Optional[str] = None) -> bool:
+    """可领取但已执行 INGESTION_MAX_ATTEMPTS 次的任务直接标记为失败，返回是否标记
+
+    执行中途进程崩溃（例如 PDF/OCR 进程池内存不足）的任务会在每次重启时
+    被接管，达到次数上限后不再执行，等待管理员处理。
+    """
+    message = f"解析已尝试 {settings.INGESTION_MAX_ATTEMPTS} 次仍未完成"
+    result = db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            _claimable(orphaned_owner),
+            IngestionJob.attempts >= settings.INGESTION_MAX_ATTEMPTS
+        )
+        .values(
+            status=JobStatus.FAILED,
+            owner=None,
+            error_message=message,
+            finished_at=datetime.now(timezone.utc)
+        )
+        .returning(IngestionJob.file_id)
+        .execution_options(synchronize_session=False)
+    )
+    file_id = result.scalar()
+    if file_id is None:
+        db.rollback()
+        return False
+    set_file_status(db, db.get(DocumentFile, file_id), DocumentStatus.FAILED, message)
+    db.commit()
+    logger.error(f"{message}，不再自动执行: job_id={job_id}")
+    return True
+
+def _claim_job(db: Session, job_id: int, orphaned_owner: Optional[str] = None) -> bool:
+    """原子地领取任务（见 _claimable），已达到执行次数上限的任务不会被领取"""
+    now = datetime.now(timezone.utc)
+    result = db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            _claimable(orphaned_owner),
+            IngestionJob.attempts < settings.INGESTION_MAX_ATTEMPTS
+        )
+        .values(
+            status=JobStatus.RUNNING,
+            owner=PROCESS_ID,
+            heartbeat_at=now,
+            started_at=func.coalesce(IngestionJob.started_at, now),
+            attempts=IngestionJob.attempts + 1
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def run_ingestion_job(job_id: int, orphaned_owner: Optional[str] = None) -> None:
+    """执行一个解析任务（在工作线程中运行，使用独立的数据库会话）"""
+    db = SessionLocal()
+    heartbeat = None
+    try:
+        if not _claim_job(db, job_id, orphaned_owner):
+            if _fail_exhausted(db, job_id, orphaned_owner):
+                return
+            logger.info(f"解析任务不存在或已由其他进程执行: job_id={job_id}")
+            return
+        heartbeat = _Heartbeat(job_id)
+        heartbeat.start()
+        job = db.get(IngestionJob, job_id)
+        stored = job.file
+
+        set_file_status(db, stored, DocumentStatus.PARSING)
+        db.commit()
+
+        try:
+            _ingest_file(db, job, stored)
+            _fenced_update(
+                db, job_id,
+                status=JobStatus.SUCCEEDED,
+                error_message=None,
+                finished_at=datetime.now(timezone.utc)
+            )
+            set_file_status(db, stored, DocumentStatus.READY)
+            db.commit()
+            logger.info(f"解析完成: job_id={job_id}, file_id={stored.id}, pages={stored.total_pages}")
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            db.rollback()
+            logger.error(f"解析失败: job_id={job_id}, 错误: {str(e)}")
+            # 保留上传文件和已提交的页面，以便重试时从检查点继续
+            _fenced_update(
+                db, job_id,
+                status=JobStatus.FAILED,
+                error_message=str(e),
+                finished_at=datetime.now(timezone.utc)
+            )
+            set_file_status(db, stored, DocumentStatus.FAILED, str(e))
+            db.commit()
+    except LeaseLostError as e:
+        # 任务已被重试或由其他进程接管，由当前持有者决定任务和文件的状态
+        db.rollback()
+        logger.warning(str(e))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"解析任务执行异常: job_id={job_id}, 错误: {str(e)}")
+    finally:
+        if heartbeat is not None:
+            heartbeat.stop()
+        db.close()
+
+def _stalled():
+    """停滞的任务：运行中但心跳超时、排队过久未被执行，或已失败"""
+    stalled_before = datetime.now(timezone.utc) - timedelta(seconds=settings.INGESTION_STALL_SECONDS)
+    return or_(
+        _running_stalled_since(stalled_before),
+        and_(IngestionJob.status == JobStatus.QUEUED, IngestionJob.created_at < stalled_before),
+        IngestionJob.status == JobStatus.FAILED
+    )
+
+def stalled_jobs_query(db: Session):
+    """停滞或失败、可以重试的任务"""
+    return db.query(IngestionJob).filter(_stalled())
+
+def enqueue_file(db: Session, stored: DocumentFile, user_id: int, document_id: int) -> IngestionJob:
+    """为新上传的文档安排解析，返回属于该文档的任务（会提交事务）
+
+    每个文档都有自己的任务记录，但同一文件只由一个任务执行解析：
+    - 文件已解析完成：直接复用已有页面，记录一个已完成的任务
+    - 文件正在解析：记录一个等待中的任务，随进行中的任务一起结束
+    - 文件上次解析失败：从检查点重试上次的任务，同样记录一个等待中的任务
+    - 新文件：创建任务并提交到线程池
+    """
+    latest = db.query(IngestionJob).filter(
+        IngestionJob.file_id == stored.id,
+        IngestionJob.status != JobStatus.WAITING
+    ).order_by(IngestionJob.id.desc()).first()
+
+    if stored.status == DocumentStatus.READY:
+        now = datetime.now(timezone.utc)
+        job = IngestionJob(
+            user_id=user_id,
+            file_id=stored.id,
+            document_id=document_id,
+            status=JobStatus.SUCCEEDED,
+            pages_committed=stored.total_pages or 0,
+            started_at=now,
+            finished_at=now
+        )
+        db.add(job)
+        db.commit()
+        logger.info(f"文件已解析，复用已有页面: file_id={stored.id}, document_id={document_id}")
+        return job
+
+    if latest is not None and latest.status in (JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.FAILED):
+        job = IngestionJob(
+            user_id=user_id,
+            file_id=stored.id,
+            document_id=document_id,
+            status=JobStatus.WAITING,
+            pages_committed=latest.pages_committed
+        )
+        db.add(job)
+        # 失败的任务可能已被管理员同时重试，此时只需等待
+        retried = latest.status == JobStatus.FAILED and _requeue(db, latest.id)
+        if retried:
+            set_file_status(db, stored, DocumentStatus.PENDING)
+        db.commit()
+        if retried:
+            submit_ingestion_job(latest.id)
+        return job
+
+    job = IngestionJob(
+        user_id=user_id,
+        file_id=stored.id,
+        document_id=document_id,
+        status=JobStatus.QUEUED
+    )
+    db.add(job)
+    db.commit()
+    submit_ingestion_job(job.id)
+    return job
+
+def _requeue(db: Session, job_id: int, reset_attempts: bool = False) -> bool:
+    """把停滞或失败的任务重新置为排队状态（不提交），返回是否已重置
+
+    判断和重置在同一条 UPDATE 中完成；正在执行（心跳正常）或已完成的任务
+    不会被重置。原执行进程之后的写入因 owner 被清空而失效。同一文件的其他
+    失败任务改为等待本任务，保证每个文件只有一个任务在解析。
+    """
+    values = dict(
+        status=JobStatus.QUEUED,
+        owner=None,
+        heartbeat_at=None,
+        error_message=None,
+        finished_at=None
+    )
+    if reset_attempts:
+        values["attempts"] = 0
+    result = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, _stalled())
+        .values(**values)
+        .returning(IngestionJob.file_id)
+        .execution_options(synchronize_session=False)
+    )
+    file_id = result.scalar()
+    if file_id is None:
+        return False
+    db.query(IngestionJob).filter(
+        IngestionJob.file_id == file_id,
+        IngestionJob.id != job_id,
+        IngestionJob.status == JobStatus.FAILED
+    ).update({
+        IngestionJob.status: JobStatus.WAITING,
+        IngestionJob.error_message: None,
+        IngestionJob.finished_at: None
+    }, synchronize_session=False)
+    return True
+
+def retry_job(db: Session, job: IngestionJob, reset_attempts: bool = False) -> bool:
+    """把停滞或失败的任务重新置为排队状态并提交到线程池，返回是否已重试
+
+    已完成的页面不会重新解析。reset_attempts 清零执行次数（管理员手动重试时）。
+    """
+    if not _requeue(db, job.id, reset_attempts):
+        db.rollback()
+        return False
+    set_file_status(db, job.file, DocumentStatus.PENDING)
+    db.commit()
+    submit_ingestion_job(job.id)
+    return True
+
+def _owner_exited(owner: str) -> bool:
+    """持有任务的进程是否确定已经退出：同一主机上的旧进程（pid 与本进程相同
+    但启动标识不同，或 pid 已不存在）。其他主机的进程无法判断，返回 False
+    """
+    host, _, rest = owner.partition(":")
+    pid, _, _ = rest.partition(":")
+    if host != _HOSTNAME or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner != PROCESS_ID
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+def recover_interrupted_jobs() -> int:
+    """启动时重新提交上次进程退出时未完成的任务，返回提交数量
+
+    排队中的任务和心跳超时的运行中任务直接重新提交；由本机已退出的进程
+    持有的运行中任务视为遗留任务立即接管，无需等待心跳超时。其他心跳仍新鲜
+    的运行中任务（可能属于另一台主机上仍在运行的进程）在心跳超时后再提交，
+    届时如果原进程仍在刷新心跳，领取会失败。同一任务被多个进程提交时，
+    只有领取成功的进程会执行。
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        stalled_before = now - timedelta(seconds=settings.INGESTION_STALL_SECONDS)
+        jobs = db.query(IngestionJob.id, IngestionJob.owner, IngestionJob.heartbeat_at).filter(
+            or_(
+                IngestionJob.status == JobStatus.QUEUED,
+                IngestionJob.status == JobStatus.RUNNING
+            )
+        ).order_by(IngestionJob.id).all()
+    finally:
+        db.close()
+
+    submitted = 0
+    for job_id, owner, heartbeat_at in jobs:
+        if heartbeat_at is None or heartbeat_at < stalled_before:
+            submit_ingestion_job(job_id)
+        elif owner and _owner_exited(owner):
+            submit_ingestion_job(job_id, orphaned_owner=owner)
+        else:
+            delay = (heartbeat_at - stalled_before).total_seconds() + 1
+            timer = threading.Timer(delay, submit_ingestion_job, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            continue
+        submitted += 1
+    if submitted:
+        logger.info(f"重新提交未完成的解析任务: {submitted} 个")
+    return submitted
@@ -0,0 +1,204 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.dictionary import DictionaryEntry
+from app.schemas.word import WordDefinition
+
+logger = logging.getLogger(__name__)
+
+MAX_WORD_LENGTH = 100
+MAX_PHONETIC_LENGTH = 200
+
+def _phonetic(value: Optional[str]) -> Optional[str]:
+    return value[:MAX_PHONETIC_LENGTH] if value else None
+
+def load_definition(word: str) -> Optional[WordDefinition]:
+    """按主键从本地词典读取释义（同步，使用独立会话，适合放到线程中执行）"""
+    db = SessionLocal()
+    try:
+        entry = db.get(DictionaryEntry, word)
+        if entry is None:
+            return None
+        return WordDefinition(
+            word=entry.word,
+            phonetic=entry.phonetic,
+            meanings=entry.meanings,
+            source=entry.source
+        )
+    finally:
+        db.close()
+
+def store_definition(definition: WordDefinition) -> None:
+    """把从词典 API 查询到的释义写入本地词典（同步，使用独立会话）"""
+    db = SessionLocal()
+    try:
+        upsert_entries(db, [{
+            "word": definition.word,
+            "phonetic": _phonetic(definition.phonetic),
+            "meanings": definition.meanings,
+            "source": definition.source,
+        }])
+        db.commit()
+    finally:
+        db.close()
+
+def upsert_entries(db: Session, rows: List[dict], import_started: Optional[datetime] = None) -> None:
+    """批量写入词条（不提交）
+
+    已存在的单词默认被覆盖。给出 import_started 时（批量导入，rows 的 updated_at
+    为导入开始时间），本次导入中较早批次写入的单词会合并：追加释义，保留已有
+    音标；导入之前就存在的单词仍被覆盖，重复导入同一文件不会产生重复的释义。
+    """
+    if not rows:
+        return
+    stmt = pg_insert(DictionaryEntry).values(rows)
+    phonetic = stmt.excluded.phonetic
+    meanings = stmt.excluded.meanings
+    if import_started is not None:
+        same_import = DictionaryEntry.updated_at >= import_started
+        phonetic = case(
+            (same_import, func.coalesce(DictionaryEntry.phonetic, stmt.excluded.phonetic)),
+            else_=stmt.excluded.phonetic
+        )
+        meanings = case(
+            (same_import, DictionaryEntry.meanings.op("||")(stmt.excluded.meanings)),
+            else_=stmt.excluded.meanings
+        )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DictionaryEntry.word],
+        set_={
+            "phonetic": phonetic,
+            "meanings": meanings,
+            "source": stmt.excluded.source,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt)
+
+def parse_api_entry(word: str, data) -> Optional[WordDefinition]:
+    """把词典 API 的响应转换为 WordDefinition，没有词条时返回 None"""
+    if not isinstance(data, list) or len(data) == 0:
+        return None
+    entry = data[0]
+    
+    # 提取音标
+    phonetic = entry.get("phonetic", "")
+    if not phonetic and "phonetics" in entry:
+        for ph in entry["phonetics"]:
+            if ph.get("text"):
+                phonetic = ph["text"]
+                break
+    
+    # 提取释义
+    meanings = []
+    if "meanings" in entry:
+        for meaning in entry["meanings"]:
+            part_of_speech = meaning.get("partOfSpeech", "")
+            definitions = []
+            for def_item in meaning.get("definitions", []):
+                definitions.append({
+                    "definition": def_item.get("definition", ""),
+                    "example": def_item.get("example", "")
+                })
+            meanings.append({
+                "partOfSpeech": part_of_speech,
+                "definitions": definitions
+            })
+    
+    return WordDefinition(
+        word=word,
+        phonetic=phonetic,
+        meanings=meanings
+    )
+
+def parse_kaikki(lines: Iterable[str]) -> Iterator[dict]:
+    """解析 kaikki.org 的 Wiktionary JSONL 导出（每行一个词性下的词条）"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if item.get("lang_code", "en") != "en" or not item.get("word"):
+            continue
+        definitions = []
+        for sense in item.get("senses", []):
+            glosses = sense.get("glosses") or sense.get("raw_glosses")
+            if not glosses:
+                continue
+            examples = sense.get("examples") or []
+            definitions.append({
+                "definition": "; ".join(glosses),
+                "example": examples[0].get("text", "") if examples else ""
+            })
+        if not definitions:
+            continue
+        phonetic = next((s["ipa"] for s in item.get("sounds", []) if s.get("ipa")), None)
+        yield {
+            "word": item["word"],
+            "phonetic": phonetic,
+            "meanings": [{"partOfSpeech": item.get("pos", ""), "definitions": definitions}],
+        }
+
+def parse_dictionaryapi(lines: Iterable[str]) -> Iterator[dict]:
+    """解析每行一个 dictionaryapi.dev 格式词条的 JSONL（与在线 API 的响应结构相同）"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        entries = item if isinstance(item, list) else [item]
+        if not entries or not entries[0].get("word"):
+            continue
+        definition = parse_api_entry(entries[0]["word"], entries)
+        if definition is not None and definition.meanings:
+            yield {"word": definition.word, "phonetic": definition.phonetic, "meanings": definition.meanings}
+
+PARSERS = {
+    "kaikki": parse_kaikki,
+    "dictionaryapi": parse_dictionaryapi,
+}
+
+def import_dump(db: Session, file: TextIO, fmt: str, source: str, batch_size: int = 1000) -> int:
+    """把词典导出文件批量导入本地词典，每批一个事务，返回导入的单词数
+
+    同一单词的多个词条（不同词性、大小写）合并为一条：批内直接合并，落在
+    不同批次的词条在写入时与本次导入已写入的释义合并。
+    """
+    batch: Dict[str, dict] = {}
+    imported = 0
+    started = datetime.now(timezone.utc)
+
+    def flush():
+        nonlocal batch, imported
+        upsert_entries(db, list(batch.values()), import_started=started)
+        db.commit()
+        imported += len(batch)
+        logger.info(f"已导入 {imported} 个单词")
+        batch = {}
+
+    for entry in PARSERS[fmt](file):
+        word = entry["word"].strip().lower()
+        if not word or len(word) > MAX_WORD_LENGTH:
+            continue
+        row = batch.get(word)
+        if row is None:
+            if len(batch) >= batch_size:
+                flush()
+            batch[word] = {
+                "word": word,
+                "phonetic": _phonetic(entry["phonetic"]),
+                "meanings": list(entry["meanings"]),
+                "source": source,
+                "updated_at": started,
+            }
+        else:
+            row["meanings"].extend(entry["meanings"])
+            row["phonetic"] = row["phonetic"] or _phonetic(entry["phonetic"])
+    if batch:
+        flush()
+    return imported
@@ -0,0 +1,115 @@
+import re
+from typing import Iterable, Iterator
+
+# 可以用反斜杠转义的字符
+ESCAPABLE = set("\\`*_{}[]()#+-.!>")
+LIST_MARKERS = ("- ", "* ", "+ ")
+BULLET = "• "
+
+_HTML_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_SPECIAL = re.compile(r"[\\*_]")
+
+def _escape(text: str) -> str:
+    return text.translate(_HTML_ESCAPES)
+
+def convert_inline(text: str) -> str:
+    """把单行内的加粗/斜体转换为 <strong>/<em>，线性时间
+
+    从左到右扫描一次：遇到 * / _ 分隔符时，若栈中有同类开始分隔符就闭合它
+    （夹在中间未匹配的开始分隔符保持原样），否则作为开始分隔符入栈。每个
+    分隔符最多入栈、出栈一次，不存在正则回溯。_ 在单词内部（如 snake_case、
+    URL）不视为分隔符。
+    """
+    out = []        # 输出片段
+    stack = []      # 待匹配的开始分隔符: (分隔符, 在 out 中的位置)
+    counts = {}     # 分隔符 -> 栈中数量，用于 O(1) 判断是否存在可匹配项
+    n = len(text)
+    i = 0
+    while i < n:
+        match = _SPECIAL.search(text, i)
+        if match is None:
+            out.append(_escape(text[i:]))
+            break
+        j = match.start()
+        if j > i:
+            out.append(_escape(text[i:j]))
+        i = j
+        ch = text[i]
+
+        if ch == "\\":
+            if i + 1 < n and text[i + 1] in ESCAPABLE:
+                out.append(_escape(text[i + 1]))
+                i += 2
+            else:
+                out.append("\\")
+                i += 1
+            continue
+
+        j = i
+        while j < n and text[j] == ch:
+            j += 1
+        run = j - i
+        marker = text[i:j]
+        if run > 2:
+            out.append(marker)
+            i = j
+            continue
+
+        prev = text[i - 1] if i > 0 else " "
+        nxt = text[j] if j < n else " "
+        can_open = not nxt.isspace()
+        can_close = not prev.isspace()
+        if ch == "_":
+            can_open = can_open and not prev.isalnum()
+            can_close = can_close and not nxt.isalnum()
+
+        if can_close and counts.get(marker):
+            # 弹出到匹配的开始分隔符为止，中间的分隔符按普通文本输出
+            while True:
+                opened, index = stack.pop()
+                counts[opened] -= 1
+                if opened == marker:
+                    break
+            tag = "strong" if run == 2 else "em"
+            out[index] = f"<{tag}>"
+            out.append(f"</{tag}>")
+        elif can_open:
+            stack.append((marker, len(out)))
+            counts[marker] = counts.get(marker, 0) + 1
+            out.append(marker)
+        else:
+            out.append(marker)
+        i = j
+
+    return "".join(out)
+
+def convert_line(line: str) -> str:
+    """转换一行 Markdown（不含换行符）：标题、无序列表和行内格式"""
+    stripped = line.lstrip(" ")
+    indent = len(line) - len(stripped)
+
+    if indent <= 3 and stripped.startswith("#"):
+        level = len(stripped) - len(stripped.lstrip("#"))
+        if level <= 6 and (len(stripped) == level or stripped[level] in " \t"):
+            content = stripped[level:].strip()
+            # 去掉可选的结尾 #
+            if content.endswith("#"):
+                trimmed = content.rstrip("#")
+                if not trimmed or trimmed[-1] in " \t":
+                    content = trimmed.rstrip()
+            return f"<strong>{convert_inline(content)}</strong>" if content else ""
+
+    if stripped.startswith(LIST_MARKERS):
+        return line[:indent] + BULLET + convert_inline(stripped[2:])
+
+    return convert_inline(line)
+
+def convert_markdown(lines: Iterable[str]) -> Iterator[str]:
+    """逐行把 Markdown 转换为 HTML 片段，可直接消费文件对象
+
+    行内格式不跨行（与原先不带 DOTALL 的正则一致），因此每行独立转换，
+    内存中只保留当前行，不会产生整篇文档的中间副本。
+    """
+    for line in lines:
+        body = line.rstrip("\r\n")
+        yield convert_line(body) + ("\n" if len(body) != len(line) else "")
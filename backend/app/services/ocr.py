@@ -0,0 +1,108 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Iterator, Optional, Tuple
+from app.core.config import settings
+
+# OCR相关导入（可选）
+try:
+    from pdf2image import convert_from_path
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+    logging.warning("OCR libraries not available. Image PDF support will be limited.")
+
+logger = logging.getLogger(__name__)
+
+# OCR 进程池：光栅化和识别都在子进程中完成，图片不跨进程传递
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _worker_count() -> int:
+    return settings.OCR_WORKERS or os.cpu_count() or 1
+
+def get_pool() -> ProcessPoolExecutor:
+    """获取（必要时创建）OCR 进程池，默认大小为 CPU 核数"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=_worker_count())
+    return _pool
+
+def shutdown_pool(wait: bool = True) -> None:
+    """关闭 OCR 进程池"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+
+def ocr_page(file_path: str, page_number: int, dpi: int, lang: str,
+             grayscale: bool, timeout: int) -> str:
+    """光栅化并识别单页（页码从1开始），在子进程中运行"""
+    images = convert_from_path(
+        file_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        grayscale=grayscale,
+        timeout=timeout
+    )
+    if not images:
+        return ""
+    image = images[0]
+    try:
+        # timeout 到期时 pytesseract 会终止 tesseract 进程并抛出 RuntimeError
+        return pytesseract.image_to_string(image, lang=lang, timeout=timeout).strip()
+    finally:
+        image.close()
+
+def ocr_pdf_pages(file_path: str, total_pages: int, dpi: Optional[int] = None,
+                  first_page: int = 1) -> Iterator[Tuple[int, Optional[str]]]:
+    """从 first_page 开始逐页 OCR，按页码顺序产出 (页索引, 文本)，识别失败或超时的页文本为 None
+
+    同时在途的页数不超过 OCR_MAX_INFLIGHT，因此内存中存活的
+    光栅图片数量有上限，与 PDF 总页数无关。
+    """
+    dpi = dpi or settings.OCR_DPI
+    timeout = settings.OCR_PAGE_TIMEOUT
+    max_inflight = settings.OCR_MAX_INFLIGHT or _worker_count()
+    pool = get_pool()
+
+    pending = deque()
+    next_page = first_page
+
+    def submit_next():
+        nonlocal next_page
+        future = pool.submit(
+            ocr_page, file_path, next_page, dpi,
+            settings.OCR_LANG, settings.OCR_GRAYSCALE, timeout
+        )
+        pending.append((next_page, future))
+        next_page += 1
+
+    while next_page <= total_pages and len(pending) < max_inflight:
+        submit_next()
+
+    try:
+        while pending:
+            page_number, future = pending.popleft()
+            try:
+                # 子进程内已有超时控制，这里多留一些余量兜底
+                text = future.result(timeout=timeout * 2)
+                logger.info(f"OCR extracted {len(text)} characters from page {page_number}")
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning(f"OCR timed out for page {page_number}")
+                text = None
+            except Exception as e:
+                logger.warning(f"OCR failed for page {page_number}: {str(e)}")
+                text = None
+
+            if next_page <= total_pages:
+                submit_next()
+
+            yield page_number - 1, text
+    finally:
+        # 调用方提前结束迭代时，取消尚未开始的页面
+        for _, future in pending:
+            future.cancel()
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from app.core.config import settings
+from app.services.lru_cache import LRUCache
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或与排序方式不匹配"""
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """把排序键的值编码为不透明的游标字符串"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    """解码游标，parsers 按顺序把每个值还原为排序列的类型"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("length mismatch")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"无效的游标: {cursor}") from e
+
+def keyset_page(query: Query, columns: Sequence, descending: bool, cursor: Optional[List[Any]],
+                limit: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[List[Any], Optional[str]]:
+    """按 columns 做键集分页，返回 (本页记录, 下一页游标)
+
+    columns 的最后一列必须唯一（通常是主键），所有列同向排序，这样
+    (列...) < (游标值...) 的行比较可以直接走 (过滤列, 列...) 的复合索引，
+    翻到多深都只扫描 limit 行。key 从一条记录取出排序键的值用于生成游标。
+    """
+    if cursor is not None:
+        row, bound = tuple_(*columns), tuple_(*cursor)
+        query = query.filter(row < bound if descending else row > bound)
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+class CountCache(LRUCache[int]):
+    """带过期时间和容量上限的计数缓存
+
+    列表总数只在缓存过期或数据变更后重新计算，滚动加载时不会每页都做一次 COUNT。
+    键的第一个元素是列表名，第二个是用户 ID，便于按用户失效。
+    """
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], int]) -> int:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, scope: str, user_id: int) -> None:
+        """清除某个用户在某个列表上的全部计数"""
+        with self._lock:
+            for key in [k for k in self._entries if k[:2] == (scope, user_id)]:
+                del self._entries[key]
+
+count_cache = CountCache(settings.COUNT_CACHE_SIZE, settings.COUNT_CACHE_TTL)
@@ -0,0 +1,162 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# 边界类型，数值越小优先级越高
+PARAGRAPH, SENTENCE, WORD = 0, 1, 2
+
+SENTENCE_ENDINGS = ".!?…"
+CJK_SENTENCE_ENDINGS = "。！？"
+CLOSING_PUNCTUATION = "\"'”’)]"
+VOID_TAGS = {"br", "hr", "img"}
+
+_TAG_NAME = re.compile(r"</?\s*([a-zA-Z][a-zA-Z0-9]*)")
+
+def _is_tag_start(text: str, i: int) -> bool:
+    """'<' 后面紧跟字母或 '/字母' 时才视为标签开始，避免把 'a < b' 当成标签"""
+    nxt = text[i + 1:i + 3]
+    return bool(nxt) and (nxt[0].isalpha() or (nxt[0] == "/" and nxt[1:2].isalpha()))
+
+def paginate(chunks: Union[str, Iterable[str]], page_size: int, min_ratio: float = 0.5,
+             max_ratio: float = 2.0) -> Iterator[str]:
+    """单遍扫描，把带内联标签的文本切分成约 page_size 个字符的页面
+
+    页面长度达到 page_size 后，在 [page_size * min_ratio, 当前位置] 范围内
+    依次优先选择最近的段落边界、句子边界、单词边界作为分页点。分页点不会
+    落在标签内部，并优先选择没有未闭合元素的位置，不切断 <strong>/<em> 等
+    元素；只有元素内部才有边界时（例如超过一页的粗体段落），在元素内部的
+    边界分页，在页尾补上闭合标签，并在下一页开头重新打开这些标签。若到
+    page_size * max_ratio 仍找不到任何边界（超长单词），则在当前位置强制分页。
+
+    chunks 可以是完整字符串，也可以是逐段产出文本的迭代器（例如逐行转换的
+    Markdown）；每个字符只访问一次，已输出的部分只在超过缓冲区一半时才
+    整体丢弃，复杂度 O(n)。
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    source = iter(chunks)
+    exhausted = False
+
+    min_size = int(page_size * min_ratio)
+    max_size = int(page_size * max_ratio)
+
+    buf = ""                         # 缓冲区：已输出的部分、当前页及尚未扫描的文本
+    start = 0                        # 当前页在缓冲区中的起点
+    prefix = ""                      # 上一页被强制截断时需要在本页重新打开的标签
+    boundaries = [-1, -1, -1]        # 当前页最近的段落/句子/单词边界在缓冲区中的位置（无未闭合元素）
+    nested = [-1, -1, -1]            # 同上，但位于未闭合元素内部
+    nested_tags: List[Tuple[Tuple[str, str], ...]] = [(), (), ()]  # nested 各边界处打开的元素
+    open_tags: List[Tuple[str, str]] = []  # (标签名, 原始开始标签)
+    newlines = 0                     # 当前空白串中的换行数
+    prev_char = ""                   # 上一个非空白正文字符
+    prev_char2 = ""                  # 再往前一个非空白正文字符
+
+    i = 0
+    while True:
+        # 标签判断需要向后看两个字符，缓冲区不足时先读入更多文本
+        if i + 2 >= len(buf) and not exhausted:
+            try:
+                buf += next(source)
+            except StopIteration:
+                exhausted = True
+            continue
+        if i >= len(buf):
+            break
+
+        ch = buf[i]
+
+        if ch == "<" and _is_tag_start(buf, i):
+            end = buf.find(">", i)
+            if end == -1 and not exhausted:
+                # 标签跨越了输入块，读入下一块后重新处理
+                try:
+                    buf += next(source)
+                except StopIteration:
+                    exhausted = True
+                continue
+            if end != -1:
+                raw = buf[i:end + 1]
+                match = _TAG_NAME.match(raw)
+                name = match.group(1).lower() if match else ""
+                if raw.startswith("</"):
+                    # 弹出到匹配的开始标签为止
+                    for depth in range(len(open_tags) - 1, -1, -1):
+                        if open_tags[depth][0] == name:
+                            del open_tags[depth:]
+                            break
+                elif not raw.endswith("/>") and name not in VOID_TAGS:
+                    open_tags.append((name, raw))
+                i = end + 1
+                newlines = 0
+            else:
+                i += 1
+        else:
+            if ch.isspace() or ch in CJK_SENTENCE_ENDINGS:
+                kinds = []
+                if ch in CJK_SENTENCE_ENDINGS:
+                    kinds.append(SENTENCE)
+                else:
+                    if ch == "\n":
+                        newlines += 1
+                        if newlines >= 2:
+                            kinds.append(PARAGRAPH)
+                    if prev_char in SENTENCE_ENDINGS or (
+                        prev_char in CLOSING_PUNCTUATION and prev_char2 in SENTENCE_ENDINGS
+                    ):
+                        kinds.append(SENTENCE)
+                    kinds.append(WORD)
+                if open_tags:
+                    snapshot = tuple(open_tags)
+                    for kind in kinds:
+                        nested[kind] = i + 1
+                        nested_tags[kind] = snapshot
+                else:
+                    for kind in kinds:
+                        boundaries[kind] = i + 1
+            if ch.isspace():
+                prev_char = prev_char2 = ""
+            else:
+                newlines = 0
+                prev_char2, prev_char = prev_char, ch
+            i += 1
+
+        if i - start < page_size:
+            continue
+
+        cut: Optional[int] = None
+        tags: Tuple[Tuple[str, str], ...] = ()
+        for kind in (PARAGRAPH, SENTENCE, WORD):
+            if boundaries[kind] >= start + min_size:
+                cut = boundaries[kind]
+                break
+        else:
+            for kind in (PARAGRAPH, SENTENCE, WORD):
+                if nested[kind] >= start + min_size:
+                    cut, tags = nested[kind], nested_tags[kind]
+                    break
+
+        if cut is not None:
+            # 在元素内部分页时闭合这些元素，下一页重新打开
+            yield prefix + buf[start:cut] + "".join(f"</{name}>" for name, _ in reversed(tags))
+            prefix = "".join(raw for _, raw in tags)
+        elif i - start >= max_size:
+            # 强制分页：闭合当前打开的元素，下一页重新打开
+            closing = "".join(f"</{name}>" for name, _ in reversed(open_tags))
+            yield prefix + buf[start:i] + closing
+            prefix = "".join(raw for _, raw in open_tags)
+            cut = i
+        else:
+            continue
+
+        start = cut
+        boundaries = [b if b > cut else -1 for b in boundaries]
+        nested = [b if b > cut else -1 for b in nested]
+        if start > len(buf) // 2:
+            # 已输出的部分超过缓冲区一半时才丢弃，每个字符被复制的总次数有常数上界
+            buf = buf[start:]
+            i -= start
+            boundaries = [b - start if b >= 0 else -1 for b in boundaries]
+            nested = [b - start if b >= 0 else -1 for b in nested]
+            start = 0
+
+    if start < len(buf):
+        yield prefix + buf[start:]
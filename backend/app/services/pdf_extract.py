@@ -0,0 +1,131 @@
+import os
+import time
+import inspect
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Type
+from PyPDF2 import PdfReader
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PageText(NamedTuple):
+    """单页提取结果"""
+    index: int       # 页索引（从0开始）
+    text: str
+    seconds: float   # 提取耗时
+
+class PdfTextBackend(ABC):
+    """PDF 文本提取后端接口
+
+    子类实现 page_count 和 extract_range；extract_range 会在子进程中调用，
+    后端按名称注册，由子进程自行实例化，因此实例本身不需要可序列化。
+    """
+    name = ""
+
+    @abstractmethod
+    def page_count(self, file_path: str) -> int:
+        """文档页数"""
+
+    @abstractmethod
+    def extract_range(self, file_path: str, start: int, end: int) -> List[PageText]:
+        """提取 [start, end) 范围内各页的文本"""
+
+class PyPDF2Backend(PdfTextBackend):
+    """默认后端：PyPDF2"""
+    name = "pypdf2"
+
+    def page_count(self, file_path: str) -> int:
+        return len(PdfReader(file_path).pages)
+
+    def extract_range(self, file_path: str, start: int, end: int) -> List[PageText]:
+        reader = PdfReader(file_path)
+        results = []
+        for index in range(start, end):
+            began = time.perf_counter()
+            text = reader.pages[index].extract_text() or ""
+            results.append(PageText(index, text, time.perf_counter() - began))
+        return results
+
+_BACKENDS: Dict[str, Type[PdfTextBackend]] = {}
+
+def register_pdf_backend(backend: Type[PdfTextBackend]) -> Type[PdfTextBackend]:
+    """注册 PDF 文本提取后端（可用作类装饰器）
+
+    未实现全部抽象方法或没有名称的后端在注册时就报错，而不是在子进程中实例化时。
+    """
+    if inspect.isabstract(backend):
+        missing = ", ".join(sorted(backend.__abstractmethods__))
+        raise TypeError(f"PDF 提取后端 {backend.__name__} 未实现: {missing}")
+    if not backend.name:
+        raise TypeError(f"PDF 提取后端 {backend.__name__} 缺少 name")
+    _BACKENDS[backend.name] = backend
+    return backend
+
+register_pdf_backend(PyPDF2Backend)
+
+def get_pdf_backend(name: Optional[str] = None) -> PdfTextBackend:
+    """按名称获取后端实例，默认使用 PDF_TEXT_BACKEND 配置"""
+    name = name or settings.PDF_TEXT_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"未知的 PDF 提取后端: {name}")
+    return _BACKENDS[name]()
+
+# PDF 文本提取进程池
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_pool() -> ProcessPoolExecutor:
+    """获取（必要时创建）PDF 提取进程池，默认大小为 CPU 核数"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1)
+    return _pool
+
+def shutdown_pool(wait: bool = True) -> None:
+    """关闭 PDF 提取进程池"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+
+def _extract_range_task(backend_name: str, file_path: str, start: int, end: int) -> List[PageText]:
+    """子进程入口"""
+    return get_pdf_backend(backend_name).extract_range(file_path, start, end)
+
+def extract_pdf_text(file_path: str, backend_name: Optional[str] = None) -> Iterator[PageText]:
+    """按页码顺序产出每页的文本和提取耗时
+
+    页数达到 PDF_PARALLEL_MIN_PAGES 时，把页面按 PDF_PAGES_PER_TASK 切分成
+    若干区间并行提取；页数较少时在当前进程内顺序提取，省去进程池开销。
+    """
+    backend_name = backend_name or settings.PDF_TEXT_BACKEND
+    backend = get_pdf_backend(backend_name)
+    total_pages = backend.page_count(file_path)
+    began = time.perf_counter()
+    slowest: Optional[PageText] = None
+
+    if total_pages < settings.PDF_PARALLEL_MIN_PAGES:
+        batches = iter([backend.extract_range(file_path, 0, total_pages)])
+    else:
+        step = max(1, settings.PDF_PAGES_PER_TASK)
+        pool = get_pool()
+        futures = [
+            pool.submit(_extract_range_task, backend_name, file_path, start, min(start + step, total_pages))
+            for start in range(0, total_pages, step)
+        ]
+        batches = (future.result() for future in futures)
+
+    for batch in batches:
+        for page in batch:
+            logger.debug(f"PDF page {page.index + 1} extracted in {page.seconds * 1000:.1f} ms")
+            if slowest is None or page.seconds > slowest.seconds:
+                slowest = page
+            yield page
+
+    if slowest is not None:
+        logger.info(
+            f"PDF text extracted with {backend_name}: {total_pages} pages in "
+            f"{time.perf_counter() - began:.2f}s, slowest page {slowest.index + 1} "
+            f"({slowest.seconds * 1000:.1f} ms)"
+        )
@@ -0,0 +1,109 @@
+import os
+import logging
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.document import Document, DocumentFile
+from app.models.word import WordClick
+from app.services.file_storage import lock_content
+from app.services.highlight import remove_phrases
+from app.services.ingestion import get_executor
+from app.services.pagination import count_cache
+from app.services.vocabulary import rebuild_vocabulary
+
+logger = logging.getLogger(__name__)
+
+def submit_purge(document_id: int) -> None:
+    """把已软删除文档的清理提交到后台线程池"""
+    get_executor().submit(purge_document, document_id)
+    logger.info(f"文档清理已入队: document_id={document_id}")
+
+def _purge_file(db: Session, file_id: int) -> None:
+    """文件不再被任何文档（包括尚未清理的软删除文档）引用时删除文件记录和磁盘文件
+
+    页面、倒排索引和解析任务通过 ON DELETE CASCADE 一并删除。检查引用和删除
+    磁盘文件都在内容锁内进行：上传相同内容时要先取得同一个锁，才能复用磁盘
+    文件并创建引用它的记录。
+    """
+    stored = db.get(DocumentFile, file_id)
+    if stored is None:
+        return
+    lock_content(db, stored.content_hash)
+    stored = db.query(DocumentFile).filter(
+        DocumentFile.id == file_id
+    ).with_for_update().populate_existing().first()
+    if stored is None:
+        db.rollback()
+        return
+    if db.query(Document.id).filter(Document.file_id == file_id).first():
+        db.rollback()
+        return
+    file_path = stored.file_path
+    db.query(DocumentFile).filter(DocumentFile.id == file_id).delete(synchronize_session=False)
+    try:
+        db.flush()
+    except IntegrityError:
+        # 删除期间有新上传复用了这个文件
+        db.rollback()
+        return
+
+    # 删除磁盘文件后再提交释放锁（删除失败只记录日志）
+    if os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+            logger.info(f"成功删除文件: {file_path}")
+        except OSError as e:
+            logger.warning(f"删除文件失败: {file_path}, 错误: {str(e)}")
+    db.commit()
+
+def purge_document(document_id: int) -> bool:
+    """删除软删除文档的数据库记录，并清理不再被引用的文件
+
+    点击记录通过 ON DELETE CASCADE 删除，解析任务与文档的关联置空；随后重新汇总
+    受影响的单词。返回是否清理了该文档（已被其他进程清理时返回 False）。
+    """
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            Document.deleted_at.isnot(None)
+        ).with_for_update(skip_locked=True).first()
+        if document is None:
+            return False
+        user_id, file_id = document.user_id, document.file_id
+
+        clicks = db.query(WordClick.word, WordClick.selected_text).filter(
+            WordClick.document_id == document_id
+        ).all()
+        words = {word for word, _ in clicks}
+        db.query(Document).filter(Document.id == document_id).delete(synchronize_session=False)
+        rebuild_vocabulary(db, user_id, words)
+        db.commit()
+        count_cache.invalidate("words", user_id)
+        remove_phrases(db, user_id, [phrase for _, phrase in clicks])
+        logger.info(f"文档记录已清理: document_id={document_id}, 受影响单词 {len(words)} 个")
+
+        _purge_file(db, file_id)
+    except Exception:
+        db.rollback()
+        logger.exception(f"清理文档失败: document_id={document_id}")
+        return False
+    finally:
+        db.close()
+    return True
+
+def purge_deleted_documents() -> int:
+    """启动时提交上次退出前未完成清理的软删除文档，返回提交数量"""
+    db = SessionLocal()
+    try:
+        document_ids = [document_id for (document_id,) in db.query(Document.id).filter(
+            Document.deleted_at.isnot(None)
+        ).order_by(Document.id).all()]
+    finally:
+        db.close()
+
+    for document_id in document_ids:
+        submit_purge(document_id)
+    if document_ids:
+        logger.info(f"重新提交未完成的文档清理: {len(document_ids)} 个")
+    return len(document_ids)
@@ -0,0 +1,52 @@
+from typing import List, Tuple
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+from app.models.document import Document, DocumentStatus, Page, SEARCH_CONFIG
+
+TAG_PATTERN = "<[^>]+>"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+
+def search_pages(db: Session, user_id: int, q: str, skip: int, limit: int) -> Tuple[List[dict], int]:
+    """在用户所有已解析文档的页面中全文检索，按相关度排序，返回 (命中列表, 总数)
+
+    匹配和排序只使用 GIN 索引上的 search_vector；高亮片段 ts_headline 开销
+    较大，只对分页后的结果计算。
+    """
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    query = func.websearch_to_tsquery(config, q)
+
+    matches = select(
+        Document.id.label("document_id"),
+        Document.title.label("document_title"),
+        Page.page_number,
+        Page.content,
+        func.ts_rank_cd(Page.search_vector, query).label("rank")
+    ).join(
+        Document, Document.file_id == Page.file_id
+    ).where(
+        Document.user_id == user_id,
+        Document.deleted_at.is_(None),
+        Document.status == DocumentStatus.READY,
+        Page.search_vector.op("@@")(query)
+    )
+
+    total = db.execute(select(func.count()).select_from(matches.subquery())).scalar_one()
+    if total == 0:
+        return [], 0
+
+    hits = matches.order_by(
+        literal_column("rank").desc(), Document.id, Page.page_number
+    ).offset(skip).limit(limit).subquery("hits")
+
+    plain_content = func.regexp_replace(hits.c.content, TAG_PATTERN, " ", "g")
+    rows = db.execute(
+        select(
+            hits.c.document_id,
+            hits.c.document_title,
+            hits.c.page_number,
+            hits.c.rank,
+            func.ts_headline(config, plain_content, query, HEADLINE_OPTIONS).label("snippet")
+        ).order_by(hits.c.rank.desc(), hits.c.document_id, hits.c.page_number)
+    ).all()
+
+    return [dict(row._mapping) for row in rows], total
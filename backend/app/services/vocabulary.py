@@ -0,0 +1,254 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import Integer, case, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from app.models.word import SELECTION_CONSTRAINT, UserVocabulary, WordClick
+from app.services.vocabulary_profile import MASTERED
+
+# 掌握状态的全部取值
+MASTERY_STATUSES = ("生词", "熟悉", MASTERED)
+
+def selection_word(selected_text: str) -> str:
+    """选中文本的第一个单词（小写），作为 WordClick.word 和生词本的键"""
+    parts = selected_text.split()
+    return parts[0].lower() if parts else ""
+
+def save_selections(db: Session, user_id: int, selections: Sequence[Mapping]) -> List[WordClick]:
+    """批量保存选中文本（不提交），返回与输入一一对应的点击记录
+
+    每条 selection 包含 document_id、selected_text、user_translation、page_number、
+    position_in_page。以 (user_id, document_id, selected_text) 为唯一键用一条
+    INSERT ... ON CONFLICT DO UPDATE 写入：已存在的记录在数据库中原子地累加
+    click_count，并发的重复点击不会产生重复行。同一批次内的重复选择先合并，
+    翻译和位置以最后一次为准。
+    """
+    merged: Dict[Tuple[int, str], dict] = {}
+    for selection in selections:
+        key = (selection["document_id"], selection["selected_text"])
+        row = merged.pop(key, None) or {
+            "user_id": user_id,
+            "document_id": selection["document_id"],
+            "selected_text": selection["selected_text"],
+            "word": selection_word(selection["selected_text"]),
+            "click_count": 0,
+        }
+        row["click_count"] += 1
+        row["user_translation"] = selection["user_translation"]
+        row["page_number"] = selection["page_number"]
+        row["position_in_page"] = selection.get("position_in_page")
+        merged[key] = row  # 重新插入，保持按最后一次出现排序
+    if not merged:
+        return []
+
+    stmt = pg_insert(WordClick).values(list(merged.values()))
+    stmt = stmt.on_conflict_do_update(
+        constraint=SELECTION_CONSTRAINT,
+        set_={
+            "click_count": func.coalesce(WordClick.click_count, 0) + stmt.excluded.click_count,
+            "user_translation": stmt.excluded.user_translation,
+            "page_number": stmt.excluded.page_number,
+            "position_in_page": stmt.excluded.position_in_page,
+            "last_clicked_at": func.now(),
+        }
+    ).returning(WordClick)
+    clicks = db.scalars(stmt, execution_options={"populate_existing": True}).all()
+    by_key = {(click.document_id, click.selected_text): click for click in clicks}
+
+    # 汇总表：每个单词累加本批次的点击次数，指向本批次中最后一次点击的记录
+    vocabulary: Dict[str, dict] = {}
+    for key, row in merged.items():
+        entry = vocabulary.setdefault(row["word"], {"clicks": 0})
+        entry["clicks"] += row["click_count"]
+        entry["latest_click_id"] = by_key[key].id
+    record_clicks(db, user_id, vocabulary)
+
+    return [by_key[(s["document_id"], s["selected_text"])] for s in selections]
+
+def record_clicks(db: Session, user_id: int, words: Mapping[str, Mapping]) -> None:
+    """更新汇总行：按单词累加点击次数并指向最近的点击记录（不提交）
+
+    words: 单词 -> {"clicks": 新增点击次数, "latest_click_id": 最近的点击记录}
+    """
+    if not words:
+        return
+    stmt = pg_insert(UserVocabulary).values([
+        {
+            "user_id": user_id,
+            "word": word,
+            "click_count": entry["clicks"],
+            "first_clicked_at": func.now(),
+            "last_clicked_at": func.now(),
+            "mastery_status": "生词",
+            "latest_click_id": entry["latest_click_id"],
+        }
+        for word, entry in words.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserVocabulary.user_id, UserVocabulary.word],
+        set_={
+            "click_count": UserVocabulary.click_count + stmt.excluded.click_count,
+            "last_clicked_at": stmt.excluded.last_clicked_at,
+            "latest_click_id": stmt.excluded.latest_click_id,
+        }
+    )
+    db.execute(stmt)
+
+def rebuild_vocabulary(db: Session, user_id: Optional[int] = None,
+                       words: Optional[Iterable[str]] = None) -> int:
+    """根据 word_clicks 重新计算汇总行（不提交），返回写入的行数
+
+    可限定用户和单词；删除点击记录后用它修正受影响的单词，没有剩余点击的单词
+    随之移除。已有的汇总行只更新点击统计，掌握状态和复习计划保持不变；新建的
+    行取最近一次点击记录上的掌握状态。
+    """
+    filters = []
+    if user_id is not None:
+        filters.append(WordClick.user_id == user_id)
+    if words is not None:
+        words = list(words)
+        if not words:
+            return 0
+        filters.append(WordClick.word.in_(words))
+
+    # 移除没有剩余点击记录的单词
+    remaining = select(WordClick.id).where(
+        WordClick.user_id == UserVocabulary.user_id,
+        WordClick.word == UserVocabulary.word
+    ).exists()
+    delete = db.query(UserVocabulary).filter(~remaining)
+    if user_id is not None:
+        delete = delete.filter(UserVocabulary.user_id == user_id)
+    if words is not None:
+        delete = delete.filter(UserVocabulary.word.in_(words))
+    delete.delete(synchronize_session=False)
+
+    totals = select(
+        WordClick.user_id,
+        WordClick.word,
+        func.sum(func.coalesce(WordClick.click_count, 1)).label("click_count"),
+        func.min(WordClick.first_clicked_at).label("first_clicked_at"),
+        func.max(WordClick.last_clicked_at).label("last_clicked_at"),
+    ).where(*filters).group_by(WordClick.user_id, WordClick.word).subquery("totals")
+
+    latest = select(
+        WordClick.user_id, WordClick.word, WordClick.id, WordClick.mastery_status
+    ).where(*filters).distinct(WordClick.user_id, WordClick.word).order_by(
+        WordClick.user_id, WordClick.word,
+        WordClick.last_clicked_at.desc().nulls_last(), WordClick.id.desc()
+    ).subquery("latest")
+
+    rows = select(
+        totals.c.user_id, totals.c.word, totals.c.click_count,
+        totals.c.first_clicked_at, totals.c.last_clicked_at,
+        func.coalesce(latest.c.mastery_status, "生词"), latest.c.id
+    ).join(latest, (latest.c.user_id == totals.c.user_id) & (latest.c.word == totals.c.word))
+
+    stmt = pg_insert(UserVocabulary).from_select([
+        "user_id", "word", "click_count", "first_clicked_at", "last_clicked_at",
+        "mastery_status", "latest_click_id"
+    ], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserVocabulary.user_id, UserVocabulary.word],
+        set_={
+            "click_count": stmt.excluded.click_count,
+            "first_clicked_at": stmt.excluded.first_clicked_at,
+            "last_clicked_at": stmt.excluded.last_clicked_at,
+            "latest_click_id": stmt.excluded.latest_click_id,
+        }
+    )
+    return db.execute(stmt).rowcount
+
+def _word_filters(user_id: int, words: Optional[Iterable[str]], document_id: Optional[int]):
+    """批量操作的目标单词条件：汇总表条件和点击记录条件
+
+    words 与 document_id 同时给出时取交集；document_id 选择在该文档中点击过的单词。
+    """
+    vocabulary_filters = [UserVocabulary.user_id == user_id]
+    click_filters = [WordClick.user_id == user_id]
+    if words is not None:
+        words = [word.lower() for word in words]
+        vocabulary_filters.append(UserVocabulary.word.in_(words))
+        click_filters.append(WordClick.word.in_(words))
+    if document_id is not None:
+        # 别名避免子查询与 UPDATE/DELETE 的目标表相关联
+        clicked = aliased(WordClick)
+        in_document = select(clicked.word).where(
+            clicked.user_id == user_id, clicked.document_id == document_id
+        )
+        vocabulary_filters.append(UserVocabulary.word.in_(in_document))
+        click_filters.append(WordClick.word.in_(in_document))
+    return vocabulary_filters, click_filters
+
+def update_mastery(db: Session, user_id: int, mastery_status: str,
+                   words: Optional[Iterable[str]] = None, document_id: Optional[int] = None) -> int:
+    """用两条 UPDATE 批量修改单词的掌握状态（不提交），返回受影响的单词数"""
+    vocabulary_filters, click_filters = _word_filters(user_id, words, document_id)
+    updated = db.query(UserVocabulary).filter(*vocabulary_filters).update(
+        {UserVocabulary.mastery_status: mastery_status}, synchronize_session=False
+    )
+    # 同步原始点击记录上的状态
+    db.query(WordClick).filter(*click_filters).update(
+        {WordClick.mastery_status: mastery_status}, synchronize_session=False
+    )
+    return updated
+
+def delete_words(db: Session, user_id: int, words: Optional[Iterable[str]] = None,
+                 document_id: Optional[int] = None) -> Tuple[int, List[str]]:
+    """用两条 DELETE 从生词本删除单词及其全部点击记录（不提交）
+
+    按文档筛选时删除的是在该文档中出现过的单词，包括它们在其他文档中的点击。
+    返回 (删除的单词数, 被删除点击记录的选中文本)。
+    """
+    vocabulary_filters, click_filters = _word_filters(user_id, words, document_id)
+    # 先删汇总行：按文档筛选的子查询依赖尚未删除的点击记录
+    deleted = db.query(UserVocabulary).filter(*vocabulary_filters).delete(synchronize_session=False)
+    phrases = db.execute(
+        delete(WordClick).where(*click_filters).returning(WordClick.selected_text)
+    ).scalars().all()
+    return deleted, phrases
+
+# SM-2 复习评分：0-5，低于 PASSING_GRADE 视为忘记，重新开始
+PASSING_GRADE = 3
+MIN_EASE = 1.3
+
+def review_queue(db: Session, user_id: int, limit: int) -> List[Tuple[UserVocabulary, WordClick]]:
+    """按到期时间取出最多 limit 个已到期、未掌握的单词
+
+    沿只包含未掌握单词的 (user_id, due_at) 部分索引顺序读取，只访问返回的行，
+    与生词本大小和已掌握的单词数无关。状态以字面量写入 SQL，规划器才能确定
+    查询条件蕴含索引条件。
+    """
+    return db.query(UserVocabulary, WordClick).join(
+        WordClick, WordClick.id == UserVocabulary.latest_click_id
+    ).filter(
+        UserVocabulary.user_id == user_id,
+        UserVocabulary.due_at <= func.now(),
+        UserVocabulary.mastery_status != literal(MASTERED, literal_execute=True)
+    ).order_by(UserVocabulary.due_at).limit(limit).all()
+
+def grade_review(db: Session, user_id: int, word: str, grade: int) -> Optional[UserVocabulary]:
+    """用一条 UPDATE 按 SM-2 更新复习计划（不提交），单词不存在时返回 None
+
+    SET 右侧引用的都是更新前的值，因此间隔、系数和到期时间可以在同一语句中计算。
+    """
+    passed = grade >= PASSING_GRADE
+    penalty = 5 - grade
+    if passed:
+        interval = case(
+            (UserVocabulary.repetitions == 0, 1),
+            (UserVocabulary.repetitions == 1, 6),
+            else_=cast(func.round(UserVocabulary.review_interval * UserVocabulary.ease), Integer)
+        )
+    else:
+        interval = literal(1)
+    stmt = update(UserVocabulary).where(
+        UserVocabulary.user_id == user_id,
+        UserVocabulary.word == word.lower()
+    ).values(
+        review_interval=interval,
+        repetitions=UserVocabulary.repetitions + 1 if passed else 0,
+        ease=func.greatest(MIN_EASE, UserVocabulary.ease + (0.1 - penalty * (0.08 + penalty * 0.02))),
+        due_at=func.now() + func.make_interval(0, 0, 0, interval),
+        last_reviewed_at=func.now()
+    ).returning(UserVocabulary)
+    return db.scalars(stmt, execution_options={"populate_existing": True}).first()
@@ -0,0 +1,104 @@
+import re
+from collections import Counter
+from typing import Collection, Dict, Iterable, Iterator, List, Mapping, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.document import Page
+from app.services.word_index import WORD_PATTERN, normalize_word
+
+_WORD = re.compile(WORD_PATTERN)
+_TAG = re.compile(r"<[^>]*>|&#?\w+;")
+
+MASTERED = "已掌握"
+
+def count_page_words(counter: Counter, content: str) -> None:
+    """统计一页中的单词（规范化为小写、统一撇号）
+
+    正则的 findall、str.lower 和 Counter.update 的计数循环都在 C 中执行，
+    整页一次处理，不逐词调用 Python 代码。
+    """
+    text = _TAG.sub(" ", content).lower().replace("’", "'")
+    counter.update(_WORD.findall(text))
+
+def counting_pages(pages: Iterable[str], counter: Counter) -> Iterator[str]:
+    """原样产出页面，同时累计词频，用于在解析写入的同一遍中建立档案"""
+    for content in pages:
+        count_page_words(counter, content)
+        yield content
+
+def count_stored_pages(db: Session, file_id: int, counter: Counter,
+                       up_to_page: Optional[int] = None, batch_size: int = 200) -> None:
+    """统计已存储页面的词频（断点续传时补上检查点之前的页，或用于回填）"""
+    query = db.query(Page.content).filter(Page.file_id == file_id)
+    if up_to_page is not None:
+        query = query.filter(Page.page_number <= up_to_page)
+    for (content,) in query.order_by(Page.page_number).yield_per(batch_size):
+        count_page_words(counter, content)
+
+def build_profile(counter: Counter) -> dict:
+    """压缩的词频档案：总词数、不同单词数和出现最多的 VOCAB_PROFILE_SIZE 个单词
+
+    被截掉的长尾都是低频词，排名时按未知词计入。
+    """
+    return {
+        "tokens": sum(counter.values()),
+        "distinct": len(counter),
+        "words": dict(counter.most_common(settings.VOCAB_PROFILE_SIZE)),
+    }
+
+def user_vocabulary_states(entries: Iterable) -> Dict[str, str]:
+    """(单词, 掌握状态) -> {规范化单词: 掌握状态}"""
+    states = {}
+    for word, mastery_status in entries:
+        normalized = normalize_word(word)
+        if normalized:
+            states[normalized] = mastery_status
+    return states
+
+def estimate_difficulty(profile: Mapping, states: Mapping[str, str]) -> dict:
+    """用用户的生词本估计文档中的未知词密度
+
+    只有生词本中已掌握的单词计为已知；其余单词，包括生词本中未掌握的（生词、熟悉）、
+    从未点击过的和档案截掉的长尾，一律计为未知。长尾中的单词无法与生词本比对，
+    按未点击处理，不同词数取 distinct - len(words)。只对档案和生词本的交集做查找，
+    遍历两者中较小的一个。
+    """
+    words: Mapping[str, int] = profile.get("words") or {}
+    tokens = profile.get("tokens") or 0
+    distinct = profile.get("distinct") or 0
+
+    mastered_tokens = 0
+    mastered_words = 0
+    if len(states) < len(words):
+        pairs = ((words.get(word), status) for word, status in states.items())
+    else:
+        pairs = ((count, states.get(word)) for word, count in words.items())
+    for count, status in pairs:
+        if count is not None and status == MASTERED:
+            mastered_tokens += count
+            mastered_words += 1
+
+    return {
+        "total_words": tokens,
+        "distinct_words": distinct,
+        "unknown_words": distinct - mastered_words,
+        "unknown_density": (tokens - mastered_tokens) / tokens if tokens else 0.0,
+        "mastered_density": mastered_tokens / tokens if tokens else 0.0,
+    }
+
+def page_words(content: str) -> List[str]:
+    """页面中的不同单词（规范化），按第一次出现的顺序"""
+    text = _TAG.sub(" ", content).lower().replace("’", "'")
+    return list(dict.fromkeys(_WORD.findall(text)))
+
+def rare_words(words: Iterable[str], profile: Optional[Mapping], exclude: Collection[str],
+               limit: int) -> List[str]:
+    """按文档中的出现次数从少到多挑出最多 limit 个单词（用于预取释义）
+
+    档案之外的长尾词出现次数按 0 计，最先入选；次数相同时保持原顺序。
+    跳过 exclude 中的单词。
+    """
+    counts: Mapping[str, int] = (profile or {}).get("words") or {}
+    candidates = [word for word in words if word not in exclude]
+    candidates.sort(key=lambda word: counts.get(word, 0))
+    return candidates[:limit]
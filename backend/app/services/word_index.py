@@ -0,0 +1,142 @@
+import re
+import html
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.document import Document, Page
+from app.models.word import WordIndexEntry
+
+MAX_WORD_LENGTH = 100
+UPSERT_CHUNK_SIZE = 1000
+
+WORD_PATTERN = r"[A-Za-z]+(?:['’][A-Za-z]+)*"
+# 一次扫描同时识别标签、HTML 实体（跳过）、单词和句子结束
+_TOKEN = re.compile(
+    r"<[^>]*>|&#?\w+;"
+    rf"|(?P<word>{WORD_PATTERN})"
+    r"|(?P<end>[.!?]+(?=[\s\"'”’)<]|$)|[。！？]+|\n)"
+)
+_WORD = re.compile(WORD_PATTERN)
+_TAG = re.compile(r"<[^>]*>")
+
+def normalize_word(text: str) -> str:
+    """取文本中的第一个单词并规范化（小写、统一撇号），没有单词时返回空字符串"""
+    match = _WORD.search(text)
+    return match.group(0).lower().replace("’", "'") if match else ""
+
+def sentence_spans(content: str) -> Dict[str, Tuple[int, int]]:
+    """单遍扫描页面，返回每个单词第一次出现的句子范围 (起点, 终点)"""
+    first: Dict[str, Tuple[int, int]] = {}
+    sentence_start = 0
+    pending: List[str] = []
+    for match in _TOKEN.finditer(content):
+        word = match.group("word")
+        if word:
+            pending.append(word)
+        elif match.group("end") is not None:
+            end = match.end()
+            for word in pending:
+                word = word.lower().replace("’", "'")
+                if len(word) <= MAX_WORD_LENGTH and word not in first:
+                    first[word] = (sentence_start, end)
+            pending = []
+            sentence_start = end
+    for word in pending:
+        word = word.lower().replace("’", "'")
+        if len(word) <= MAX_WORD_LENGTH and word not in first:
+            first[word] = (sentence_start, len(content))
+    return first
+
+def index_pages(db: Session, file_id: int, pages: Iterable[Mapping]) -> None:
+    """为一批页面（含 page_number、content）建立索引，追加到已有的倒排记录（不提交）
+
+    与页面写入在同一事务中执行，断点续传时索引与已提交的页面保持一致。
+    """
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for page in pages:
+        for word, (start, end) in sentence_spans(page["content"]).items():
+            postings[word].extend((page["page_number"], start, end))
+    if not postings:
+        return
+
+    rows = [{"file_id": file_id, "word": word, "postings": value} for word, value in postings.items()]
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = pg_insert(WordIndexEntry).values(rows[i:i + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WordIndexEntry.file_id, WordIndexEntry.word],
+            set_={"postings": func.array_cat(WordIndexEntry.postings, stmt.excluded.postings)}
+        )
+        db.execute(stmt)
+
+def delete_file_index(db: Session, file_id: int) -> int:
+    """删除文件的全部索引记录（不提交），返回删除行数"""
+    return db.query(WordIndexEntry).filter(
+        WordIndexEntry.file_id == file_id
+    ).delete(synchronize_session=False)
+
+def rebuild_file_index(db: Session, file_id: int, batch_size: int = 200) -> None:
+    """根据已存储的页面重建文件的索引（用于回填，不提交）"""
+    delete_file_index(db, file_id)
+    query = db.query(Page.page_number, Page.content).filter(
+        Page.file_id == file_id
+    ).order_by(Page.page_number).yield_per(batch_size)
+    batch = []
+    for page_number, content in query:
+        batch.append({"page_number": page_number, "content": content})
+        if len(batch) >= batch_size:
+            index_pages(db, file_id, batch)
+            batch = []
+    if batch:
+        index_pages(db, file_id, batch)
+
+def _clean_context(snippet: str) -> str:
+    """去掉标签、还原实体并压缩空白"""
+    return " ".join(html.unescape(_TAG.sub("", snippet)).split())
+
+def find_word_contexts(db: Session, word: str, documents: List[Document],
+                       limit: int) -> Iterator[Tuple[Document, int, str]]:
+    """通过倒排索引查找单词在各文档中的上下文句子，产出 (文档, 页码, 句子)
+
+    全词匹配，每页一个上下文，最多读取 limit 个页面。
+    """
+    normalized = normalize_word(word)
+    if not normalized or not documents:
+        return
+
+    documents_by_file: Dict[int, List[Document]] = defaultdict(list)
+    for document in documents:
+        documents_by_file[document.file_id].append(document)
+
+    entries = db.query(WordIndexEntry).filter(
+        WordIndexEntry.file_id.in_(documents_by_file.keys()),
+        WordIndexEntry.word == normalized
+    ).order_by(WordIndexEntry.file_id).all()
+
+    wanted: List[Tuple[int, int, int, int]] = []  # (file_id, 页码, 起点, 终点)
+    for entry in entries:
+        postings = entry.postings
+        for k in range(0, len(postings), 3):
+            if len(wanted) >= limit:
+                break
+            wanted.append((entry.file_id, postings[k], postings[k + 1], postings[k + 2]))
+    if not wanted:
+        return
+
+    contents = {
+        (file_id, page_number): content
+        for file_id, page_number, content in db.query(
+            Page.file_id, Page.page_number, Page.content
+        ).filter(
+            tuple_(Page.file_id, Page.page_number).in_([(f, p) for f, p, _, _ in wanted])
+        )
+    }
+
+    for file_id, page_number, start, end in wanted:
+        content = contents.get((file_id, page_number))
+        if content is None:
+            continue
+        context = _clean_context(content[start:end])
+        for document in documents_by_file[file_id]:
+            yield document, page_number, context
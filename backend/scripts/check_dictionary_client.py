@@ -0,0 +1,176 @@
+"""用本地替身上游检查词典客户端的合并、超时、对冲、熔断、过期重用和预取隔离
+
+替身上游是 httpx.MockTransport，可以按请求注入延迟和错误状态码，不访问网络；
+本地词典层被替换为空实现，不需要数据库。在 backend 目录下运行：
+
+    python -m scripts.check_dictionary_client
+
+每项检查失败时抛出 AssertionError，全部通过时输出 OK。
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services import dictionary
+
+
+class FakeUpstream:
+    """按脚本返回的替身词典服务：每个请求依次取 (延迟秒数, 状态码)，脚本用完后重复最后一项"""
+
+    def __init__(self):
+        self.script: List[tuple] = [(0.0, 200)]
+        self.calls = 0
+
+    def respond(self, *steps: tuple) -> None:
+        self.script = list(steps)
+        self.calls = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        latency, status_code = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        await asyncio.sleep(latency)
+        if status_code != 200:
+            return httpx.Response(status_code)
+        word = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json=[{
+            "word": word,
+            "phonetic": "/test/",
+            "meanings": [{"partOfSpeech": "noun", "definitions": [{"definition": f"definition of {word}"}]}],
+        }])
+
+
+async def _no_local(word_lower: str) -> Optional[dictionary.WordDefinition]:
+    return None
+
+
+async def _skip_store(definition: dictionary.WordDefinition) -> None:
+    return None
+
+
+def reset(upstream: FakeUpstream) -> None:
+    """清空缓存并换上新的替身客户端（同时重置熔断器）"""
+    dictionary.cache.clear()
+    dictionary.set_client(httpx.AsyncClient(
+        base_url="http://dictionary.test/", transport=httpx.MockTransport(upstream.handler)
+    ))
+
+
+async def timed(word: str):
+    started = time.monotonic()
+    result = await dictionary.get_word_definition(word)
+    return result, time.monotonic() - started
+
+
+async def check_coalescing(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((0.1, 200))
+    results = await asyncio.gather(*(dictionary.get_word_definition("coalesce") for _ in range(10)))
+    assert upstream.calls == 1, f"并发查询应合并为 1 次请求，实际 {upstream.calls} 次"
+    assert all(r.source == "dictionary-api" for r in results)
+
+
+async def check_timeout(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((10.0, 200))
+    result, elapsed = await timed("slow")
+    assert result.source == "fallback"
+    assert elapsed < settings.DICTIONARY_TIMEOUT + 0.2, f"超过时间预算: {elapsed:.2f}s"
+
+
+async def check_hedge(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((10.0, 200), (0.0, 200))
+    result, elapsed = await timed("hedge")
+    assert result.source == "dictionary-api"
+    assert upstream.calls == 2, f"慢请求应触发 1 次对冲，实际请求 {upstream.calls} 次"
+    assert elapsed < settings.DICTIONARY_HEDGE_DELAY + 0.2, f"对冲请求未及时返回: {elapsed:.2f}s"
+
+
+async def check_fast_failure_not_hedged(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((0.0, 503))
+    result, _ = await timed("unavailable")
+    assert result.source == "fallback"
+    assert upstream.calls == 1, f"快速失败不应发出对冲请求，实际请求 {upstream.calls} 次"
+
+
+async def check_breaker(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((0.0, 503))
+    for i in range(settings.DICTIONARY_BREAKER_THRESHOLD):
+        await dictionary.get_word_definition(f"failing{i}")
+    assert upstream.calls == settings.DICTIONARY_BREAKER_THRESHOLD
+    assert dictionary.breaker.state == dictionary.breaker.OPEN
+
+    result, elapsed = await timed("while-open")
+    assert result.source == "fallback"
+    assert upstream.calls == settings.DICTIONARY_BREAKER_THRESHOLD, "熔断期间不应请求上游"
+    assert elapsed < 0.05, f"熔断期间应立即返回: {elapsed:.3f}s"
+
+    # 冷却结束后试探成功，熔断器闭合
+    dictionary.breaker.opened_at -= settings.DICTIONARY_BREAKER_COOLDOWN
+    upstream.respond((0.0, 200))
+    result, _ = await timed("recovered")
+    assert result.source == "dictionary-api"
+    assert dictionary.breaker.state == dictionary.breaker.CLOSED
+
+
+async def check_stale_while_revalidate(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((0.0, 200))
+    fresh = await dictionary.get_word_definition("stale")
+    dictionary.cache.set("stale", fresh, ttl=0)
+
+    # 上游变慢且出错：立即返回旧释义，后台刷新失败后旧释义继续可用
+    upstream.respond((0.2, 503))
+    result, elapsed = await timed("stale")
+    assert result.source == "dictionary-api" and elapsed < 0.05, f"应立即返回旧释义: {elapsed:.3f}s"
+    await asyncio.sleep(0.5)
+    assert upstream.calls == 1, "过期释义应在后台刷新一次"
+    result = await dictionary.get_word_definition("stale")
+    assert result.source == "dictionary-api", "刷新失败后应继续返回旧释义"
+
+
+async def check_prefetch_isolated(upstream: FakeUpstream) -> None:
+    reset(upstream)
+    upstream.respond((0.0, 503))
+    words = [f"prefetch{i}" for i in range(settings.DICTIONARY_BREAKER_THRESHOLD * 2)]
+    await dictionary.prefetch_definitions(words)
+    assert upstream.calls == len(words)
+    assert dictionary.breaker.state == dictionary.breaker.CLOSED, "预取失败不应计入熔断器"
+    assert all(word not in dictionary.cache for word in words), "预取失败不应写入缓存"
+
+    upstream.respond((0.0, 200))
+    result = await dictionary.get_word_definition(words[0])
+    assert result.source == "dictionary-api", "预取失败后交互式查询应正常请求上游"
+
+
+CHECKS = [
+    check_coalescing,
+    check_timeout,
+    check_hedge,
+    check_fast_failure_not_hedged,
+    check_breaker,
+    check_stale_while_revalidate,
+    check_prefetch_isolated,
+]
+
+
+async def main() -> None:
+    dictionary._load_local = _no_local
+    dictionary._store_local = _skip_store
+    upstream = FakeUpstream()
+    try:
+        for check in CHECKS:
+            await check(upstream)
+            print(f"{check.__name__}: ok")
+    finally:
+        await dictionary.close_client()
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
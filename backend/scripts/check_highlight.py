@@ -0,0 +1,157 @@
+"""在相同输入上对比 Aho-Corasick 短语匹配器与逐个短语查找的朴素实现
+
+朴素实现对每个已保存短语用 str.find 扫描整页，是匹配器要替代的做法。随机生成的
+短语集合和文本（大小写、空白、互为前后缀的短语）上，两者找到的匹配和最终的高亮
+区间应当完全相同；增量添加、删除短语后的匹配器与重新构建的一致。另外比较短语
+较多时两者的耗时。不访问数据库，但导入配置需要设置 DATABASE_URL。在 backend
+目录下运行：
+
+    python -m scripts.check_highlight
+
+每项检查失败时抛出 AssertionError，全部通过时输出 OK。
+"""
+import random
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.services.highlight import (
+    MAX_PHRASE_LENGTH, PhraseMatcher, _fold, _is_word_boundary, find_spans, normalize_phrase, rendered_text
+)
+
+
+def naive_matches(phrases: Iterable[str], text: str) -> Set[Tuple[int, int]]:
+    """逐个短语在折叠后的文本中查找全部（可能重叠的）出现位置"""
+    folded = "".join(_fold(ch) for ch in text)
+    found = set()
+    for key in {normalize_phrase(phrase) for phrase in phrases}:
+        if not key or len(key) > MAX_PHRASE_LENGTH:
+            continue
+        start = folded.find(key)
+        while start != -1:
+            found.add((start, start + len(key)))
+            start = folded.find(key, start + 1)
+    return found
+
+
+def naive_spans(phrases: Iterable[str], text: str) -> List[dict]:
+    """与 find_spans 相同的选取规则：单词边界对齐，不重叠，优先最左、最长"""
+    originals: Dict[str, str] = {}
+    for phrase in phrases:
+        originals.setdefault(normalize_phrase(phrase), phrase)
+    spans = []
+    covered = 0
+    for start, end in sorted(naive_matches(originals.values(), text), key=lambda m: (m[0], -m[1])):
+        if start < covered or not _is_word_boundary(text, start, end):
+            continue
+        if spans and spans[-1]["start"] == start:
+            continue
+        spans.append({"start": start, "end": end, "text": originals[normalize_phrase(text[start:end])]})
+        covered = end
+    return spans
+
+
+def matcher_matches(matcher: PhraseMatcher, text: str) -> Set[Tuple[int, int]]:
+    return {(start, end) for start, end, _ in matcher.find_all(text)}
+
+
+def random_phrase(rng: random.Random) -> str:
+    words = [
+        "".join(rng.choice("abAB") for _ in range(rng.randint(1, 3)))
+        for _ in range(rng.randint(1, 3))
+    ]
+    return rng.choice([" ", "  ", "\t"]).join(words)
+
+
+def random_text(rng: random.Random, length: int = 300) -> str:
+    return "".join(rng.choice("aabbAB  \n.,") for _ in range(length))
+
+
+def check_same_matches() -> None:
+    rng = random.Random(0)
+    for _ in range(300):
+        phrases = [random_phrase(rng) for _ in range(rng.randint(1, 30))]
+        text = random_text(rng)
+        matcher = PhraseMatcher(phrases)
+        assert matcher_matches(matcher, text) == naive_matches(phrases, text), f"匹配不同: {phrases!r} / {text!r}"
+
+
+def check_same_spans() -> None:
+    rng = random.Random(1)
+    for _ in range(300):
+        phrases = [random_phrase(rng) for _ in range(rng.randint(1, 30))]
+        text = random_text(rng)
+        spans = find_spans(PhraseMatcher(phrases), text)
+        expected = naive_spans(phrases, text)
+        assert [(s["start"], s["end"]) for s in spans] == [(s["start"], s["end"]) for s in expected], \
+            f"高亮区间不同: {phrases!r} / {text!r}"
+        assert all(normalize_phrase(s["text"]) == normalize_phrase(text[s["start"]:s["end"]]) for s in spans)
+
+
+def check_incremental_updates() -> None:
+    rng = random.Random(2)
+    matcher = PhraseMatcher()
+    current: Set[str] = set()
+    for step in range(500):
+        phrase = random_phrase(rng)
+        if current and rng.random() < 0.4:
+            phrase = rng.choice(sorted(current))
+            matcher.remove(phrase)
+            current.discard(phrase)
+            # 规范化后相同的其他写法也随之失效
+            current = {p for p in current if normalize_phrase(p) != normalize_phrase(phrase)}
+        else:
+            matcher.add(phrase)
+            current.add(phrase)
+        if step % 10 == 0:
+            text = random_text(rng)
+            assert matcher_matches(matcher, text) == matcher_matches(PhraseMatcher(current), text), \
+                f"第 {step} 步后增量更新的匹配器与重新构建的不一致"
+
+
+def check_rendered_offsets() -> None:
+    content = "<p>Tom &amp; <strong>Jerry</strong> went to New\nYork.</p>"
+    text = rendered_text(content)
+    assert text == "Tom & Jerry went to New\nYork."
+    spans = find_spans(PhraseMatcher(["tom & jerry", "new york", "york"]), text)
+    assert [(s["start"], s["end"], s["text"]) for s in spans] == [(0, 11, "tom & jerry"), (20, 28, "new york")]
+
+
+def check_speed() -> None:
+    rng = random.Random(3)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(3000)]
+    phrases = [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(5000)]
+    text = " ".join(rng.choice(words) for _ in range(400))
+    matcher = PhraseMatcher(phrases)
+    find_spans(matcher, text)  # 首次匹配前构建失配链接
+
+    started = time.perf_counter()
+    spans = find_spans(matcher, text)
+    automaton = time.perf_counter() - started
+    started = time.perf_counter()
+    expected = naive_spans(phrases, text)
+    naive = time.perf_counter() - started
+
+    assert spans == expected
+    assert automaton < naive, f"自动机 {automaton:.4f}s 不快于朴素查找 {naive:.4f}s"
+    print(f"  {len(phrases)} 个短语、{len(text)} 字符: 自动机 {automaton:.4f}s，朴素查找 {naive:.4f}s")
+
+
+CHECKS = [
+    check_same_matches,
+    check_same_spans,
+    check_incremental_updates,
+    check_rendered_offsets,
+    check_speed,
+]
+
+
+def main() -> None:
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__}: ok")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
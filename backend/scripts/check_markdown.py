@@ -0,0 +1,138 @@
+"""在相同输入上对比单遍 Markdown 转换器与原先的四次正则替换
+
+原先的转换只支持加粗和斜体。在这个子集内（随机生成的单词和 **、__、*、_ 包裹的
+片段），两者的输出应当逐字相同；子集之外的行为差异（标题、列表、转义、单词内的 _、
+HTML 特殊字符、未配对的分隔符）逐条列出并核对。另外检查转换耗时随输入线性增长，
+逐行转换时内存峰值与文件大小无关。不需要数据库。在 backend 目录下运行：
+
+    python -m scripts.check_markdown
+
+每项检查失败时抛出 AssertionError，全部通过时输出 OK。
+"""
+import random
+import re
+import time
+import tracemalloc
+from typing import List
+
+from app.services.markdown import convert_markdown
+
+_WORDS = "alpha beta gamma delta word text reader page".split()
+
+# (输入, 原先的输出, 现在的输出)：有意改变的行为
+DIFFERENCES = [
+    ("snake_case_name here", "snake<em>case</em>name here", "snake_case_name here"),
+    ("see http://a_b_c.example", "see http://a<em>b</em>c.example", "see http://a_b_c.example"),
+    ("a < b & c", "a < b & c", "a &lt; b &amp; c"),
+    ("# Title", "# Title", "<strong>Title</strong>"),
+    ("## Title ##", "## Title ##", "<strong>Title</strong>"),
+    ("- item one", "- item one", "• item one"),
+    ("\\*not em\\*", "\\<em>not em\\</em>", "*not em*"),
+    # 未配对的分隔符：原先按出现顺序两两配对，现在前有空白的 ** 不能闭合
+    ("**a **b *c* d**", "<strong>a </strong>b <em>c</em> d**", "**a <strong>b <em>c</em> d</strong>"),
+]
+
+
+def legacy_convert(content: str) -> str:
+    """原先 parse_text_file 中的转换：对全文依次做四次正则替换"""
+    content = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content)
+    content = re.sub(r'__(.+?)__', r'<strong>\1</strong>', content)
+    content = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<em>\1</em>', content)
+    content = re.sub(r'(?<!_)_(?!_)(.+?)(?<!_)_(?!_)', r'<em>\1</em>', content)
+    return content
+
+
+def convert(text: str) -> str:
+    return "".join(convert_markdown(text.splitlines(keepends=True)))
+
+
+def sample_line(rng: random.Random) -> str:
+    """原先转换器支持的子集：单词以及加粗、斜体（含粗体内嵌斜体）片段"""
+    parts = []
+    for _ in range(rng.randint(1, 12)):
+        word = rng.choice(_WORDS)
+        roll = rng.random()
+        if roll < 0.1:
+            word = f"**{word} {rng.choice(_WORDS)}**"
+        elif roll < 0.2:
+            word = f"__{word}__"
+        elif roll < 0.3:
+            word = f"*{word}*"
+        elif roll < 0.4:
+            word = f"_{word} {rng.choice(_WORDS)}_"
+        elif roll < 0.45:
+            word = f"**{word} *{rng.choice(_WORDS)}* {rng.choice(_WORDS)}**"
+        parts.append(word)
+    return " ".join(parts) + rng.choice([".", "!", "?", ""])
+
+
+def sample_lines(seed: int, count: int) -> List[str]:
+    rng = random.Random(seed)
+    return [sample_line(rng) + "\n" for _ in range(count)]
+
+
+def check_matches_legacy() -> None:
+    lines = sample_lines(0, 5000)
+    mismatches = [
+        line for line in lines if convert(line) != legacy_convert(line)
+    ]
+    assert not mismatches, f"{len(mismatches)} 行与原先的输出不同，例如: {mismatches[0]!r}"
+    # 整篇转换与逐行转换结果一致（原先的正则不跨行）
+    text = "".join(lines)
+    assert convert(text) == legacy_convert(text)
+
+
+def check_documented_differences() -> None:
+    for text, old, new in DIFFERENCES:
+        assert legacy_convert(text) == old, f"{text!r}: 原先的输出是 {legacy_convert(text)!r}"
+        assert convert(text) == new, f"{text!r}: 现在的输出是 {convert(text)!r}"
+
+
+def check_linear() -> None:
+    # 单行内大量未闭合、交错的分隔符
+    line = "*a _b **c __d " * 20000
+    timings = []
+    for factor in (1, 4):
+        started = time.perf_counter()
+        convert(line * factor)
+        timings.append(time.perf_counter() - started)
+    ratio = timings[1] / timings[0]
+    assert ratio < 8, f"输入扩大 4 倍耗时扩大 {ratio:.1f} 倍，不是线性的"
+
+
+def check_streaming_memory() -> None:
+    lines = sample_lines(1, 50000)
+    size = sum(len(line) for line in lines)
+
+    tracemalloc.start()
+    total = sum(len(html) for html in convert_markdown(iter(lines)))
+    _, streaming_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    legacy_convert("".join(lines))
+    _, legacy_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert total > size
+    assert streaming_peak < size / 20, f"逐行转换的内存峰值 {streaming_peak} 字节，输入 {size} 字节"
+    print(f"  内存峰值: 输入 {size} 字节，原先 {legacy_peak} 字节，逐行转换 {streaming_peak} 字节")
+
+
+CHECKS = [
+    check_matches_legacy,
+    check_documented_differences,
+    check_linear,
+    check_streaming_memory,
+]
+
+
+def main() -> None:
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__}: ok")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""在相同输入上对比新分页器与原先按 500 字符切片的分页方式
+
+输入是随机生成的 Markdown（段落、句子、加粗/斜体、跨页的长粗体段落、中文句子），
+先用 convert_markdown 转换为 HTML，再分别交给两种分页方式。检查：
+文本内容完全一致、新分页器不切断单词和标签、每页标签闭合、页面长度在预期范围内、
+耗时随输入线性增长。不需要数据库。在 backend 目录下运行：
+
+    python -m scripts.check_paginator
+
+每项检查失败时抛出 AssertionError，全部通过时输出 OK。
+"""
+import random
+import re
+import time
+from typing import Iterator, List
+
+from app.services.markdown import convert_markdown
+from app.services.paginator import paginate
+
+PAGE_SIZE = 500
+MIN_RATIO = 0.5
+MAX_RATIO = 2.0
+
+_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*>")
+_WORDS = (
+    "the reader opens a page and clicks an unknown word to save it with its translation "
+    "vocabulary grows slowly but steadily when the text is neither too easy nor too hard"
+).split()
+
+
+def legacy_paginate(content: str, page_size: int = PAGE_SIZE) -> Iterator[str]:
+    """原先 parse_text_file 中的分页：每 page_size 个字符一页"""
+    for i in range(0, len(content), page_size):
+        yield content[i:i + page_size]
+
+
+def sample_markdown(rng: random.Random, paragraphs: int) -> str:
+    """随机 Markdown 文本；约十分之一的段落整段加粗，长度超过一页"""
+    out = []
+    for _ in range(paragraphs):
+        if rng.random() < 0.1:
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(150, 300))]
+            out.append("**" + " ".join(words) + ".**")
+            continue
+        if rng.random() < 0.1:
+            out.append("".join("这是一个用于测试分页的中文句子。" for _ in range(rng.randint(5, 40))))
+            continue
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(3, 20))]
+            k = rng.randrange(len(words))
+            if rng.random() < 0.3:
+                words[k] = f"**{words[k]} {rng.choice(_WORDS)}**"
+            elif rng.random() < 0.3:
+                words[k] = f"*{words[k]}*"
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        out.append(" ".join(sentences))
+    return "\n\n".join(out) + "\n"
+
+
+def sample_html(seed: int, paragraphs: int = 300) -> str:
+    markdown = sample_markdown(random.Random(seed), paragraphs)
+    return "".join(convert_markdown(markdown.splitlines(keepends=True)))
+
+
+def new_pages(html: str) -> List[str]:
+    # 按行输入，与 parse_text_file 中逐行转换后分页的方式一致
+    return list(paginate(iter(html.splitlines(keepends=True)), PAGE_SIZE, MIN_RATIO, MAX_RATIO))
+
+
+def text_of(html: str) -> str:
+    return _TAG.sub("", html)
+
+
+def tag_errors(page: str) -> int:
+    """页面中未闭合、多余的闭合标签以及被截断的标签数量"""
+    stack = []
+    errors = 0
+    for closing, name in _TAG.findall(page):
+        if not closing:
+            stack.append(name)
+        elif stack and stack[-1] == name:
+            stack.pop()
+        else:
+            errors += 1
+    leftover = _TAG.sub("", page)
+    truncated = len(re.findall(r"<[a-zA-Z/][^>]*$", leftover)) + len(re.findall(r"^[^<]*?>", leftover))
+    return errors + len(stack) + truncated
+
+
+def split_words(pages: List[str]) -> int:
+    """相邻两页的分界落在单词中间的次数"""
+    count = 0
+    for left, right in zip(pages, pages[1:]):
+        a, b = text_of(left), text_of(right)
+        if a and b and a[-1].isalnum() and b[0].isalnum():
+            count += 1
+    return count
+
+
+def check_same_text() -> None:
+    for seed in range(5):
+        html = sample_html(seed)
+        old = "".join(legacy_paginate(html))
+        new = "".join(new_pages(html))
+        assert text_of(new) == text_of(old) == text_of(html), f"seed={seed}: 分页后文本内容与原来不一致"
+
+
+def check_no_split_markup() -> None:
+    old_errors = new_errors = 0
+    for seed in range(5):
+        html = sample_html(seed)
+        old_errors += sum(tag_errors(page) for page in legacy_paginate(html))
+        new_errors += sum(tag_errors(page) for page in new_pages(html))
+    assert old_errors > 0, "样本应覆盖原分页方式切断标签的情形"
+    assert new_errors == 0, f"新分页器有 {new_errors} 处标签被切断或未闭合"
+    print(f"  标签问题: 原分页 {old_errors} 处，新分页 {new_errors} 处")
+
+
+def check_no_split_words() -> None:
+    old_splits = new_splits = 0
+    for seed in range(5):
+        html = sample_html(seed)
+        old_splits += split_words(list(legacy_paginate(html)))
+        new_splits += split_words(new_pages(html))
+    assert old_splits > 0, "样本应覆盖原分页方式切断单词的情形"
+    assert new_splits == 0, f"新分页器有 {new_splits} 处切断单词"
+    print(f"  切断单词: 原分页 {old_splits} 处，新分页 {new_splits} 处")
+
+
+def check_page_sizes() -> None:
+    for seed in range(5):
+        pages = new_pages(sample_html(seed))
+        for number, page in enumerate(pages[:-1], 1):
+            assert len(page) >= PAGE_SIZE * MIN_RATIO, f"seed={seed} 第 {number} 页过短: {len(page)}"
+            assert len(text_of(page)) <= PAGE_SIZE * MAX_RATIO, f"seed={seed} 第 {number} 页过长"
+
+
+def check_forced_split() -> None:
+    # 没有任何边界的超长单词在 max_ratio 处强制分页，元素跨页时重新打开
+    html = "<strong>" + "x" * (PAGE_SIZE * 5) + "</strong>\n"
+    pages = new_pages(html)
+    assert text_of("".join(pages)) == text_of(html)
+    assert all(len(text_of(page)) <= PAGE_SIZE * MAX_RATIO for page in pages)
+    assert all(tag_errors(page) == 0 for page in pages)
+
+
+def check_linear() -> None:
+    html = sample_html(0, paragraphs=400)
+    timings = []
+    for factor in (4, 16):
+        started = time.perf_counter()
+        new_pages(html * factor)
+        timings.append(time.perf_counter() - started)
+    ratio = timings[1] / timings[0]
+    assert ratio < 8, f"输入扩大 4 倍耗时扩大 {ratio:.1f} 倍，不是线性的"
+    print(f"  耗时: {len(html) * 4} 字符 {timings[0]:.3f}s，{len(html) * 16} 字符 {timings[1]:.3f}s")
+
+
+CHECKS = [
+    check_same_text,
+    check_no_split_markup,
+    check_no_split_words,
+    check_page_sizes,
+    check_forced_split,
+    check_linear,
+]
+
+
+def main() -> None:
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__}: ok")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()